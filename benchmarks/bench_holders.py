@@ -0,0 +1,105 @@
+"""
+Holder snapshot parsing: jsonParsed dict walking (old get_holders) vs base64 + dataSlice + NumPy.
+
+    py benchmarks/bench_holders.py record <rpc_url> <mint>      save both responses to benchmarks/fixtures/
+    py benchmarks/bench_holders.py fixture <mint> [creator]     time the recorded responses
+    py benchmarks/bench_holders.py synthetic [accounts]         time generated responses (default 50000)
+"""
+import os
+import sys
+import json
+import time
+import base64
+import struct
+import random
+import httpx
+from solders.pubkey import Pubkey # type: ignore
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from holders import TOKEN_PROGRAM, aggregate_by_owner, decode_token_accounts, holder_stats, owner_addresses, owner_mask, token_accounts_request
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BONDING_CURVE = "39azUYFWPz3VHgKCf3VChUwbpURdCHRxjWVowf5jUJjg"
+
+
+def legacy(result, creator):
+    """The jsonParsed loop get_holders used before the fast path."""
+    total_supply = 0
+    holders = []
+    owner_supply = 0
+    for account in result:
+        if BONDING_CURVE not in account["account"]["data"]["parsed"]["info"]["owner"]:
+            amount = int(account["account"]["data"]["parsed"]["info"]["tokenAmount"]["amount"])
+            if amount > 0:
+                total_supply += amount
+                holders.append({"owner": account["account"]["data"]["parsed"]["info"]["owner"], "amount": amount})
+            if creator in account["account"]["data"]["parsed"]["info"]["owner"]:
+                owner_supply = int(account["account"]["data"]["parsed"]["info"]["tokenAmount"]["amount"])
+    holders = sorted(holders, key=lambda x: x["amount"], reverse=True)
+    top_10_supply = sum(holder["amount"] for holder in holders[:10])
+    return len(holders), owner_supply, top_10_supply, [holder["owner"] for holder in holders[:10]]
+
+
+def fast(result, creator):
+    owners, amounts = aggregate_by_owner(*decode_token_accounts(result))
+    keep = (amounts > 0) & ~owner_mask(owners, [BONDING_CURVE])
+    owners, amounts = owners[keep], amounts[keep]
+    stats = holder_stats(owners, amounts, creator)
+    owner_addresses(owners)
+    return stats["holder_number"], stats["owner_supply"], stats["top_supply"], owner_addresses(owners, stats["top_index"])
+
+
+def synthetic(count):
+    owners = [bytes(random.getrandbits(8) for _ in range(32)) for _ in range(count)]
+    amounts = [random.randint(0, 10 ** 13) for _ in range(count)]
+    parsed = [{
+        "pubkey": "",
+        "account": {"data": {"parsed": {"info": {"owner": str(Pubkey.from_bytes(owner)), "tokenAmount": {"amount": str(amount)}}}}}
+    } for owner, amount in zip(owners, amounts)]
+    sliced = [{
+        "pubkey": "",
+        "account": {"data": [base64.b64encode(owner + struct.pack("<Q", amount)).decode(), "base64"]}
+    } for owner, amount in zip(owners, amounts)]
+    return json.dumps({"result": parsed}), json.dumps({"result": sliced}), str(Pubkey.from_bytes(owners[0]))
+
+
+def record(rpc_url, mint):
+    os.makedirs(FIXTURES, exist_ok=True)
+    sliced = token_accounts_request(TOKEN_PROGRAM, mint)
+    parsed = {**sliced, "params": [TOKEN_PROGRAM, {"encoding": "jsonParsed", "filters": sliced["params"][1]["filters"]}]}
+    for name, payload in (("json", parsed), ("base64", sliced)):
+        response = httpx.post(rpc_url, json=payload, timeout=60)
+        with open(os.path.join(FIXTURES, f"{mint}_{name}.json"), "w") as file:
+            file.write(response.text)
+        print(f"{name}: {len(response.content) / 1e6:.2f} MB")
+
+
+def bench(label, func, raw, creator, runs=5):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = func(json.loads(raw)["result"], creator)
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:>8}: {best * 1000:8.1f} ms  response {len(raw) / 1e6:6.2f} MB  holders {output[0]}")
+    return output
+
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    if mode == "record":
+        return record(sys.argv[2], sys.argv[3])
+    if mode == "fixture":
+        with open(os.path.join(FIXTURES, f"{sys.argv[2]}_json.json")) as file:
+            parsed = file.read()
+        with open(os.path.join(FIXTURES, f"{sys.argv[2]}_base64.json")) as file:
+            sliced = file.read()
+        creator = sys.argv[3] if len(sys.argv) > 3 else BONDING_CURVE
+    else:
+        parsed, sliced, creator = synthetic(int(sys.argv[2]) if len(sys.argv) > 2 else 50000)
+    old = bench("legacy", legacy, parsed, creator)
+    new = bench("numpy", fast, sliced, creator)
+    print("results match" if old[:3] == new[:3] and set(old[3]) == set(new[3]) else f"MISMATCH {old[:3]} != {new[:3]}")
+
+
+if __name__ == "__main__":
+    main()
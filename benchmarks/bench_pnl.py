@@ -0,0 +1,148 @@
+"""
+Wallet PnL: nested per-transfer loops (old check_profit) vs the columnar engine in pnl.py.
+
+    py benchmarks/bench_pnl.py record <helius_apikey> <wallet> [wallet ...]   save up to 1000 enhanced transactions per wallet to benchmarks/fixtures/
+    py benchmarks/bench_pnl.py fixture                                        time every recorded wallet history in one call
+    py benchmarks/bench_pnl.py synthetic [wallets] [transactions]             time generated histories (default 200 x 1000)
+"""
+import os
+import sys
+import glob
+import json
+import time
+import random
+import tracemalloc
+import httpx
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pnl import profitable_share, trade_totals
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def legacy(histories):
+    """The loop check_profit and check_creator_profit ran once per wallet."""
+    shares = {}
+    for wallet, transactions in histories.items():
+        token_trades = {}
+        for tx in transactions:
+            if "SWAP" in tx["type"]:
+                token_transfers = tx.get("tokenTransfers", [])
+                native_transfers = tx.get("nativeTransfers", [])
+                for transfer in token_transfers:
+                    mint = transfer["mint"]
+                    token_amount = transfer["tokenAmount"] / (10 ** transfer.get("mintDecimals", 6))
+                    if transfer["toUserAccount"] == wallet:
+                        sol_spent = sum(t["amount"] / 1e9 for t in native_transfers if t["fromUserAccount"] == wallet)
+                        token_trades.setdefault(mint, {"buys": [], "sells": []})["buys"].append({"amount": token_amount, "sol": sol_spent})
+                    elif transfer["fromUserAccount"] == wallet:
+                        sol_received = sum(t["amount"] / 1e9 for t in native_transfers if t["toUserAccount"] == wallet)
+                        token_trades.setdefault(mint, {"buys": [], "sells": []})["sells"].append({"amount": token_amount, "sol": sol_received})
+        profitable = 0
+        for trades in token_trades.values():
+            cost = sum(buy["sol"] for buy in trades["buys"])
+            revenue = sum(sell["sol"] for sell in trades["sells"])
+            if revenue - cost > 0:
+                profitable += 1
+        if token_trades:
+            shares[wallet] = profitable / len(token_trades) * 100
+    return shares
+
+
+def fast(histories, max_rows):
+    return profitable_share(trade_totals(histories, max_rows)).to_dict()
+
+
+def synthetic(wallets, count):
+    """Swaps shaped like Helius enhanced transactions: a token leg, the opposite wSOL leg and a few fee/tip/rent transfers."""
+    mints = [f"mint{i}" for i in range(count // 4)]
+    histories = {}
+    for w in range(wallets):
+        wallet = f"wallet{w}"
+        transactions = []
+        for _ in range(count):
+            buy = random.random() < 0.5
+            pool = f"pool{random.randrange(50)}"
+            lamports = random.randint(10 ** 6, 10 ** 10)
+            transactions.append({
+                "type": "SWAP" if random.random() < 0.8 else "TRANSFER",
+                "tokenTransfers": [{
+                    "mint": random.choice(mints),
+                    "tokenAmount": random.uniform(1, 1e6),
+                    "toUserAccount": wallet if buy else pool,
+                    "fromUserAccount": pool if buy else wallet
+                }, {
+                    "mint": "So11111111111111111111111111111111111111112",
+                    "tokenAmount": lamports / 1e9,
+                    "mintDecimals": 0,
+                    "toUserAccount": pool if buy else wallet,
+                    "fromUserAccount": wallet if buy else pool
+                }],
+                "nativeTransfers": [{
+                    "amount": lamports,
+                    "fromUserAccount": wallet if buy else pool,
+                    "toUserAccount": pool if buy else wallet
+                }] + [{
+                    "amount": random.randint(5000, 2 * 10 ** 6),
+                    "fromUserAccount": wallet,
+                    "toUserAccount": f"fee{random.randrange(10)}"
+                } for _ in range(random.randint(2, 6))]
+            })
+        histories[wallet] = transactions
+    return histories
+
+
+def record(apikey, wallets):
+    os.makedirs(FIXTURES, exist_ok=True)
+    for wallet in wallets:
+        url = f"https://api.helius.xyz/v0/addresses/{wallet}/transactions?api-key={apikey}"
+        transactions = []
+        params = {"limit": 100}
+        while len(transactions) < 1000:
+            page = httpx.get(url, params=params, timeout=30).json()
+            transactions.extend(page)
+            if len(page) < 100:
+                break
+            params["before"] = page[-1]["signature"]
+        with open(os.path.join(FIXTURES, f"wallet_{wallet}.json"), "w") as file:
+            json.dump(transactions, file)
+        print(f"{wallet}: {len(transactions)} transactions")
+
+
+def bench(label, func, *args, runs=3):
+    best = float("inf")
+    for _ in range(runs):
+        started = time.perf_counter()
+        output = func(*args)
+        best = min(best, time.perf_counter() - started)
+    tracemalloc.start()
+    func(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>18}: {best * 1000:8.1f} ms  peak {peak / 1e6:7.2f} MB  wallets {len(output)}")
+    return output
+
+
+def main():
+    mode = sys.argv[1] if len(sys.argv) > 1 else "synthetic"
+    if mode == "record":
+        return record(sys.argv[2], sys.argv[3:])
+    if mode == "fixture":
+        histories = {}
+        for path in glob.glob(os.path.join(FIXTURES, "wallet_*.json")):
+            with open(path) as file:
+                histories[os.path.basename(path)[len("wallet_"):-len(".json")]] = json.load(file)
+    else:
+        wallets = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        count = int(sys.argv[3]) if len(sys.argv) > 3 else 1000
+        histories = synthetic(wallets, count)
+    print(f"{len(histories)} wallets, {sum(len(transactions) for transactions in histories.values())} transactions")
+    old = bench("legacy", legacy, histories)
+    new = bench("pnl", fast, histories, 200000)
+    bench("pnl max_rows=10k", fast, histories, 10000)
+    same = old.keys() == new.keys() and all(abs(old[wallet] - new[wallet]) < 1e-9 for wallet in old)
+    print("results match" if same else "MISMATCH")
+
+
+if __name__ == "__main__":
+    main()
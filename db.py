@@ -0,0 +1,189 @@
+import time
+import asyncio
+import asyncpg
+from logger import error, info, warn
+
+COIN_COLUMNS = [
+    "id", "token_address", "token_name", "token_img", "blacklist", "twitter_check", "telegram_check",
+    "website_check", "creator_new_wallet", "profit_owner", "oldcoins", "owner_percentage", "holder_number",
+    "percentage_top_10", "score", "top_holders_good_traders", "new_wallets_percentage", "success"
+]
+
+CREATE_COINS = """
+CREATE TABLE IF NOT EXISTS coins (
+    id TEXT PRIMARY KEY,
+    token_address TEXT NOT NULL,
+    token_name TEXT,
+    token_img TEXT,
+    blacklist BOOLEAN,
+    twitter_check BOOLEAN,
+    telegram_check BOOLEAN,
+    website_check BOOLEAN,
+    creator_new_wallet BOOLEAN,
+    profit_owner BOOLEAN,
+    oldcoins BOOLEAN,
+    owner_percentage DOUBLE PRECISION,
+    holder_number INTEGER,
+    percentage_top_10 DOUBLE PRECISION,
+    score DOUBLE PRECISION,
+    top_holders_good_traders BOOLEAN,
+    new_wallets_percentage DOUBLE PRECISION,
+    success BOOLEAN,
+    inserted_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    labeled_at TIMESTAMPTZ
+);
+"""
+
+# Column types of tables created by hand before the bot managed its schema, fixed on startup.
+NUMERIC_COLUMNS = {
+    "owner_percentage": "double precision",
+    "holder_number": "integer",
+    "percentage_top_10": "double precision",
+    "score": "double precision",
+    "new_wallets_percentage": "double precision",
+}
+
+# Keeps one row per token before the unique index is built: the labeled one if any, else the newest.
+DEDUPLICATE_COINS = """
+DELETE FROM coins WHERE ctid IN (
+    SELECT ctid FROM (
+        SELECT ctid, row_number() OVER (PARTITION BY token_address ORDER BY success IS NULL, inserted_at DESC, ctid DESC) AS n
+        FROM coins
+    ) ranked WHERE n > 1
+);
+"""
+
+INDEXES = [
+    "CREATE UNIQUE INDEX IF NOT EXISTS coins_token_address_key ON coins (token_address);",
+    "CREATE INDEX IF NOT EXISTS coins_success_inserted_at ON coins (success, inserted_at);",
+    "CREATE INDEX IF NOT EXISTS coins_labeled_at ON coins (labeled_at);",
+]
+
+# A coin seen again refreshes its features but keeps its id, insert time and outcome label.
+# labeled_at is set together with success and is the watermark for incremental training loads.
+INSERT_COIN = f"""
+INSERT INTO coins ({", ".join(COIN_COLUMNS)})
+VALUES ({", ".join(f"${i}" for i in range(1, len(COIN_COLUMNS) + 1))})
+ON CONFLICT (token_address) DO UPDATE SET
+    {", ".join(f"{column} = EXCLUDED.{column}" for column in COIN_COLUMNS if column not in ("id", "token_address", "success"))};
+"""
+
+MIGRATION_LOCK = 7310241
+
+
+class Database:
+    """
+    One asyncpg pool shared by the bot and the AI, plus a write-behind queue for coin rows.
+
+    Coins are queued with `add_coin` and upserted together with `executemany` once `flush_size`
+    rows are waiting or every `flush_interval` seconds, whichever comes first. The pool is
+    created on first use, so whoever needs it first at startup opens it and migrates the schema.
+    """
+
+    def __init__(self, user="", password="", database="", host="localhost", port=5432,
+                 pool_size=10, flush_interval=2, flush_size=50, max_pending=10000):
+        self.credentials = {"user": user, "password": password, "database": database, "host": host, "port": port}
+        self.pool_size = pool_size
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.max_pending = max_pending
+        self.pool = None
+        self.pending = []
+        self.written = 0
+        self._connect_lock = asyncio.Lock()
+        self._flush_lock = asyncio.Lock()
+        self._wakeup = asyncio.Event()
+
+    async def connect(self):
+        async with self._connect_lock:
+            if self.pool is None:
+                pool = await asyncpg.create_pool(min_size=1, max_size=self.pool_size, **self.credentials)
+                try:
+                    await self.migrate(pool)
+                except Exception:
+                    await pool.close()
+                    raise
+                self.pool = pool
+                info(f"Database pool ready ({self.pool_size} connections max)")
+        return self.pool
+
+    async def migrate(self, pool):
+        """Create the coins table and its indexes, or bring a hand-made table up to the same schema."""
+        async with pool.acquire() as conn:
+            async with conn.transaction():
+                # Several bots may start against the same database at once.
+                await conn.execute("SELECT pg_advisory_xact_lock($1);", MIGRATION_LOCK)
+                await conn.execute(CREATE_COINS)
+                await conn.execute("ALTER TABLE coins ADD COLUMN IF NOT EXISTS inserted_at TIMESTAMPTZ NOT NULL DEFAULT now();")
+                rows = await conn.fetch(
+                    "SELECT column_name, data_type FROM information_schema.columns WHERE table_name = 'coins' AND table_schema = current_schema();"
+                )
+                types = {row["column_name"]: row["data_type"] for row in rows}
+                if "labeled_at" not in types:
+                    await conn.execute("ALTER TABLE coins ADD COLUMN labeled_at TIMESTAMPTZ;")
+                    await conn.execute("UPDATE coins SET labeled_at = inserted_at WHERE success IS NOT NULL;")
+                for column, data_type in NUMERIC_COLUMNS.items():
+                    if column in types and types[column] != data_type:
+                        info(f"Database: changing coins.{column} from {types[column]} to {data_type}")
+                        await conn.execute(f"ALTER TABLE coins ALTER COLUMN {column} TYPE {data_type} USING {column}::{data_type};")
+                if await conn.fetchval("SELECT to_regclass('coins_token_address_key') IS NULL;"):
+                    removed = await conn.execute(DEDUPLICATE_COINS)
+                    info(f"Database: removed duplicate coins before indexing token_address ({removed})")
+                for statement in INDEXES:
+                    await conn.execute(statement)
+
+    async def execute(self, query, *args):
+        pool = await self.connect()
+        return await pool.execute(query, *args)
+
+    async def fetch(self, query, *args):
+        pool = await self.connect()
+        return await pool.fetch(query, *args)
+
+    async def fetchval(self, query, *args):
+        pool = await self.connect()
+        return await pool.fetchval(query, *args)
+
+    def add_coin(self, row):
+        """Queue one coin row (values in COIN_COLUMNS order) for the next flush."""
+        if len(self.pending) >= self.max_pending:
+            warn(f"Database write queue full, dropping the oldest of {len(self.pending)} coins")
+            self.pending.pop(0)
+        self.pending.append(row)
+        if len(self.pending) >= self.flush_size:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write every queued coin. Rows are put back at the front of the queue when the write fails."""
+        async with self._flush_lock:
+            if not self.pending:
+                return 0
+            rows, self.pending = self.pending, []
+            started = time.perf_counter()
+            try:
+                pool = await self.connect()
+                async with pool.acquire() as conn:
+                    await conn.executemany(INSERT_COIN, rows)
+            except Exception as e:
+                self.pending = rows + self.pending
+                error(f"Error writing {len(rows)} coins to the database, will retry: {e}")
+                return 0
+            self.written += len(rows)
+            info(f"Wrote {len(rows)} coins to the database in {(time.perf_counter() - started) * 1000:.0f} ms")
+            return len(rows)
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def close(self):
+        await self.flush()
+        if self.pending:
+            error(f"{len(self.pending)} coins could not be written before shutdown")
+        if self.pool is not None:
+            await self.pool.close()
@@ -0,0 +1,94 @@
+import time
+import numpy as np
+
+EPSILON = 1e-4
+
+
+class DriftMonitor:
+    """
+    Watches whether incoming coins still look like the coins the live model was trained on.
+
+    `fit` cuts every feature of the training data into `bins` quantile bins (plus one bin for
+    missing values) and keeps their shares as the reference. `observe` encodes a coin with the
+    feature spec and counts it in the matching bins, a binary search per feature, so the stream
+    costs a few integers per feature. Once `min_count` coins were seen, `check` returns the
+    population stability index (PSI) of every feature whose PSI is above `threshold`.
+
+    After a drift retraining is requested, `back_off` silences the checks for `cooldown` seconds,
+    doubling up to `max_cooldown` each time the drift comes back, until a new reference is loaded.
+    """
+
+    def __init__(self, spec, bins=10, threshold=0.25, min_count=200, cooldown=3600, max_cooldown=86400):
+        self.spec = spec
+        self.bins = bins
+        self.threshold = threshold
+        self.min_count = min_count
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.backoff = cooldown
+        self.quiet_until = 0.0
+        self.row = np.empty(len(spec.features), dtype=np.float32)
+        self.reference = None
+        self.counts = None
+        self.count = 0
+
+    def fit(self, X):
+        """Reference histograms from the encoded training features `X`."""
+        reference = {}
+        for name in self.spec.names:
+            values = X[name].to_numpy(dtype=np.float64)
+            present = values[~np.isnan(values)]
+            edges = np.unique(np.quantile(present, np.linspace(0, 1, self.bins + 1)[1:-1])) if len(present) else np.array([])
+            counts = np.bincount(np.searchsorted(edges, present, side="right"), minlength=len(edges) + 2)
+            counts[-1] = len(values) - len(present)
+            reference[name] = {"edges": edges.tolist(), "expected": (counts / max(len(values), 1)).tolist()}
+        self.load(reference)
+
+    def load(self, reference):
+        """Use a reference saved by `to_dict`, or stay idle when it is None."""
+        self.reference = reference and {
+            name: (np.array(bins["edges"]), np.array(bins["expected"])) for name, bins in reference.items()
+        }
+        self.backoff = self.cooldown
+        self.quiet_until = 0.0
+        self.reset()
+
+    def to_dict(self):
+        if self.reference is None:
+            return None
+        return {name: {"edges": edges.tolist(), "expected": expected.tolist()} for name, (edges, expected) in self.reference.items()}
+
+    def reset(self):
+        self.count = 0
+        self.counts = self.reference and {name: np.zeros(len(expected), dtype=np.int64) for name, (_, expected) in self.reference.items()}
+
+    def back_off(self):
+        """Restart the counts and stay quiet for the current backoff, which doubles for next time. Returns its seconds."""
+        seconds = self.backoff
+        self.quiet_until = time.monotonic() + seconds
+        self.backoff = min(self.backoff * 2, self.max_cooldown)
+        self.reset()
+        return seconds
+
+    def observe(self, data):
+        if self.reference is None:
+            return
+        self.spec.encode_row(data, self.row)
+        for name, value in zip(self.spec.names, self.row):
+            edges, expected = self.reference[name]
+            self.counts[name][len(expected) - 1 if np.isnan(value) else np.searchsorted(edges, value, side="right")] += 1
+        self.count += 1
+
+    def psi(self):
+        result = {}
+        for name, (_, expected) in self.reference.items():
+            actual = self.counts[name] / max(self.count, 1)
+            actual, reference = np.maximum(actual, EPSILON), np.maximum(expected, EPSILON)
+            result[name] = float(np.sum((actual - reference) * np.log(actual / reference)))
+        return result
+
+    def check(self):
+        """{feature: PSI} of the drifted features, empty until `min_count` coins were observed or while backing off."""
+        if self.reference is None or self.count < self.min_count or time.monotonic() < self.quiet_until:
+            return {}
+        return {name: value for name, value in self.psi().items() if value > self.threshold}
@@ -0,0 +1,35 @@
+import numpy as np
+from sklearn.metrics import roc_auc_score
+from tuning import successive_halving
+
+
+def walk_forward(X, y, inserted_at, windows=4, **settings):
+    """
+    Forward performance of the whole training procedure, the way it is used live: tuned and trained
+    on the past, scored on coins that came after.
+
+    The time-ordered rows are cut into `windows` + 1 equal slices. For each of the last `windows`
+    slices `successive_halving` runs with `settings` on every earlier row only (its validation
+    split included), and the resulting model is scored on the slice. Nothing a window is scored on
+    influences its hyperparameters or rounds. Returns one dict per window with its time range,
+    sizes, positive rate and AUC (None when the window or its past holds a single class).
+    """
+    edges = np.linspace(0, len(X), windows + 2).astype(int)
+    results = []
+    for start, end in zip(edges[1:-1], edges[2:]):
+        if start == 0 or end <= start:
+            continue
+        y_train, y_test = y.iloc[:start], y.iloc[start:end]
+        auc = None
+        if y_train.nunique() == 2 and y_test.nunique() == 2:
+            model, _ = successive_halving(X.iloc[:start], y_train, **settings)
+            auc = float(roc_auc_score(y_test, model.predict_proba(X.iloc[start:end])[:, 1]))
+        results.append({
+            "from": inserted_at.iloc[start].isoformat(),
+            "to": inserted_at.iloc[end - 1].isoformat(),
+            "train_rows": int(start),
+            "rows": int(end - start),
+            "positive_rate": float(y_test.mean()),
+            "auc": auc,
+        })
+    return results
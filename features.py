@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+
+BOOLEAN = "boolean"
+NUMBER = "number"
+
+
+class Feature:
+    """One model input. Booleans encode as 1.0 / 0.0, numbers as floats, anything else as NaN."""
+
+    def __init__(self, name, kind):
+        if kind not in (BOOLEAN, NUMBER):
+            raise ValueError(f"Unknown kind {kind} for feature {name}")
+        self.name = name
+        self.kind = kind
+
+
+FEATURES = [
+    Feature("blacklist", BOOLEAN),
+    Feature("twitter_check", BOOLEAN),
+    Feature("telegram_check", BOOLEAN),
+    Feature("website_check", BOOLEAN),
+    Feature("creator_new_wallet", BOOLEAN),
+    Feature("profit_owner", BOOLEAN),
+    Feature("oldcoins", BOOLEAN),
+    Feature("owner_percentage", NUMBER),
+    Feature("holder_number", NUMBER),
+    Feature("percentage_top_10", NUMBER),
+    Feature("score", NUMBER),
+    Feature("top_holders_good_traders", BOOLEAN),
+    Feature("new_wallets_percentage", NUMBER),
+]
+
+
+def encode_boolean(values):
+    """1.0 for True, 0.0 for False, NaN for None and anything else, over a whole column."""
+    values = np.asarray(values)
+    if values.dtype == bool:
+        return values.astype(np.float32)
+    return np.where(values == True, 1.0, np.where(values == False, 0.0, np.nan)).astype(np.float32)  # noqa: E712
+
+
+class FeatureSpec:
+    """
+    The fixed mapping from a coin's fields to the model's float32 inputs, shared by training and
+    prediction and saved with every model. Missing (None) and unexpected values become NaN, which
+    XGBoost treats as missing, so serving never fails on a value training did not see.
+    """
+
+    def __init__(self, features=None):
+        self.features = list(features or FEATURES)
+        self.names = [feature.name for feature in self.features]
+
+    def encode_frame(self, data):
+        """Float32 feature frame (one column per feature, in order) for a DataFrame of coins."""
+        columns = {}
+        for feature in self.features:
+            column = data[feature.name]
+            if feature.kind == BOOLEAN:
+                columns[feature.name] = encode_boolean(column.to_numpy())
+            else:
+                columns[feature.name] = pd.to_numeric(column, errors="coerce").to_numpy(dtype=np.float32)
+        return pd.DataFrame(columns, index=data.index)
+
+    def encode_row(self, data, out):
+        """Write the features of one coin dict into the float32 row `out`."""
+        for index, feature in enumerate(self.features):
+            value = data.get(feature.name)
+            if feature.kind == BOOLEAN:
+                out[index] = 1.0 if value is True or value is np.True_ else 0.0 if value is False or value is np.False_ else np.nan
+            else:
+                try:
+                    out[index] = np.nan if value is None else float(value)
+                except (TypeError, ValueError):
+                    out[index] = np.nan
+
+    def to_dict(self):
+        return {"features": [{"name": feature.name, "kind": feature.kind} for feature in self.features]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls([Feature(feature["name"], feature["kind"]) for feature in data["features"]])
+
+    def __eq__(self, other):
+        return isinstance(other, FeatureSpec) and self.to_dict() == other.to_dict()
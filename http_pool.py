@@ -0,0 +1,102 @@
+import importlib.util
+from urllib.parse import urlsplit
+import httpx
+from logger import info, warn
+from rate_limiter import parse_retry_after
+
+
+class HttpPool:
+    """
+    One long lived httpx.AsyncClient per upstream host.
+
+    Keeps TCP/TLS connections alive between calls instead of opening a new client for every
+    request, and counts per host how many requests had to open a new connection. Hosts routed
+    to an upstream go through that upstream's token bucket, and 429s are retried after the
+    bucket has backed off.
+    """
+
+    def __init__(self, config=None, rate_limiter=None):
+        config = config or {}
+        self.rate_limiter = rate_limiter
+        self.routes = {}
+        self.max_429_retries = config.get("max_429_retries", 5)
+        self.limits = httpx.Limits(
+            max_connections=config.get("max_connections", 100),
+            max_keepalive_connections=config.get("max_keepalive_connections", 20),
+            keepalive_expiry=config.get("keepalive_expiry", 30)
+        )
+        self.timeout = httpx.Timeout(config.get("timeout", 15), connect=config.get("connect_timeout", 10))
+        self.http2 = config.get("http2", True)
+        if self.http2 and importlib.util.find_spec("h2") is None:
+            warn("HTTP/2 requested but the h2 package is not installed, using HTTP/1.1 (pip install httpx[http2])")
+            self.http2 = False
+        self._clients = {}
+        self.stats = {}
+
+    def _host_stats(self, host):
+        if host not in self.stats:
+            self.stats[host] = {"requests": 0, "opened": 0}
+        return self.stats[host]
+
+    def client(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._clients:
+            stats = self._host_stats(host)
+
+            async def trace(event_name, trace_info):
+                if event_name == "connection.connect_tcp.complete":
+                    stats["opened"] += 1
+
+            async def on_request(request):
+                stats["requests"] += 1
+                request.extensions["trace"] = trace
+
+            self._clients[host] = httpx.AsyncClient(
+                http2=self.http2,
+                limits=self.limits,
+                timeout=self.timeout,
+                event_hooks={"request": [on_request]}
+            )
+        return self._clients[host]
+
+    def route(self, url, upstream):
+        """Send every request for the host of `url` through the `upstream` rate limit."""
+        host = urlsplit(url).netloc or url
+        self.routes[host] = upstream
+
+    async def request(self, method, url, cost=1, **kwargs):
+        """`cost` is how many rate limit tokens the request uses, e.g. the size of a JSON-RPC batch."""
+        upstream = self.routes.get(urlsplit(url).netloc)
+        if not self.rate_limiter or not upstream:
+            return await self.client(url).request(method, url, **kwargs)
+        bucket = self.rate_limiter.bucket(upstream)
+        for attempt in range(self.max_429_retries + 1):
+            await bucket.acquire(cost)
+            response = await self.client(url).request(method, url, **kwargs)
+            if response.status_code != 429:
+                bucket.on_success()
+                return response
+            bucket.on_throttle(parse_retry_after(response.headers.get("Retry-After")))
+        return response
+
+    async def get(self, url, **kwargs):
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url, **kwargs):
+        return await self.request("POST", url, **kwargs)
+
+    def connection_stats(self):
+        return {
+            host: {"opened": stats["opened"], "reused": max(stats["requests"] - stats["opened"], 0)}
+            for host, stats in self.stats.items()
+        }
+
+    def log_stats(self):
+        for host, stats in self.connection_stats().items():
+            info(f"HTTP {host}: {stats['opened']} connections opened, {stats['reused']} requests reused a connection")
+
+    async def close(self):
+        self.log_stats()
+        for client in self._clients.values():
+            await client.aclose()
+        self._clients = {}
@@ -0,0 +1,83 @@
+import time
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from logger import error
+
+
+class PredictionService:
+    """
+    Scores coins off the event loop, several at a time.
+
+    `predict` queues a coin and waits for its probability. The `run` loop takes every coin queued
+    in the same loop tick as the first one, plus those arriving within `max_wait` seconds
+    (0 by default, so a lone coin is never delayed), up to `max_batch`. It encodes them into a
+    preallocated float32 matrix and scores the batch with one `inplace_predict` call in a worker
+    thread. Latency from `predict` to result is kept for the last `window` coins.
+    """
+
+    def __init__(self, max_batch=32, max_wait=0, window=1000):
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = asyncio.Queue()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="predict")
+        self.latencies = deque(maxlen=window)
+        self.model = None
+        self.batches = 0
+
+    def load(self, model, spec):
+        """Swap in a new model and its feature spec. Batches already running keep the old one."""
+        buffer = np.empty((self.max_batch, len(spec.features)), dtype=np.float32)
+        self.model = (model.get_booster(), spec, buffer)
+
+    async def predict(self, data):
+        if self.model is None:
+            raise ValueError("The model is not trained yet.")
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((data, future, time.perf_counter()))
+        return await future
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait
+            # Let coins finishing their analysis in the same tick join this batch.
+            await asyncio.sleep(0)
+            while len(batch) < self.max_batch:
+                if not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            booster, spec, buffer = self.model
+            try:
+                for row, (data, _, _) in enumerate(batch):
+                    spec.encode_row(data, buffer[row])
+                rows = buffer[:len(batch)]
+                probabilities = await loop.run_in_executor(self.executor, lambda: booster.inplace_predict(rows))
+            except Exception as e:
+                error(f"AI: Error scoring a batch of {len(batch)} coins: {e}")
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            finished = time.perf_counter()
+            for (_, future, started), probability in zip(batch, probabilities):
+                self.latencies.append(finished - started)
+                if not future.done():
+                    future.set_result(float(probability))
+
+    def latency(self):
+        """(p50, p99) prediction latency in milliseconds over the recent window."""
+        if not self.latencies:
+            return 0.0, 0.0
+        p50, p99 = np.percentile(np.fromiter(self.latencies, dtype=np.float64), [50, 99]) * 1000
+        return float(p50), float(p99)
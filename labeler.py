@@ -0,0 +1,34 @@
+import asyncio
+from logger import error, info
+
+
+class OutcomeLabeler:
+    """
+    Follows coins whose features are already stored until their outcome is known.
+
+    Only a small record (the token address) is kept per coin, so holders and features can be
+    freed as soon as the prediction is done. `resolve(task_number, record)` returns the outcome
+    and `store(task_number, token_address, success)` writes it back.
+    """
+
+    def __init__(self, resolve, store):
+        self.resolve = resolve
+        self.store = store
+        self.pending = {}
+
+    def watch(self, token_address, task_number):
+        token_address = str(token_address)
+        if token_address in self.pending:
+            return
+        record = {"token_address": token_address}
+        self.pending[token_address] = asyncio.create_task(self._label(task_number, record))
+        info(f"{task_number} - Waiting for outcome, {len(self.pending)} coins pending")
+
+    async def _label(self, task_number, record):
+        try:
+            success = await self.resolve(task_number, record)
+            await self.store(task_number, record["token_address"], success)
+        except Exception as e:
+            error(f"{task_number} - Error labeling coin {record['token_address']}: {e}")
+        finally:
+            self.pending.pop(record["token_address"], None)
@@ -0,0 +1,165 @@
+import os
+import json
+import asyncio
+from collections import deque
+import httpx
+import websockets
+from logger import error, info, warn
+
+
+async def backfill_signatures(client, rpc_url, address, until=None, before=None, page_size=1000):
+    """Page getSignaturesForAddress backwards until `until` and return the entries oldest first."""
+    entries = []
+    while True:
+        options = {"limit": page_size}
+        if until:
+            options["until"] = until
+        if before:
+            options["before"] = before
+        response = await client.post(
+            rpc_url,
+            headers={"Content-Type": "application/json"},
+            json={"jsonrpc": "2.0", "id": "1", "method": "getSignaturesForAddress", "params": [address, options]},
+            timeout=30
+        )
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", data["error"]))
+        page = data["result"]
+        entries.extend(page)
+        # Without a cursor there is no gap to close, the newest page is enough.
+        if not until or len(page) < page_size:
+            break
+        before = page[-1]["signature"]
+    entries.reverse()
+    return entries
+
+
+class SignatureCursor:
+    """Newest processed signature and slot, persisted to disk so a restart resumes where it stopped."""
+
+    def __init__(self, path):
+        self.path = path
+        self.signature = None
+        self.slot = 0
+        try:
+            if os.path.exists(path):
+                with open(path, 'r') as file:
+                    data = json.load(file)
+                self.signature = data.get("signature")
+                self.slot = data.get("slot", 0)
+        except (OSError, json.JSONDecodeError) as e:
+            warn(f"Could not read signature cursor {path}: {e}")
+
+    def advance(self, signature, slot):
+        if slot < self.slot:
+            return
+        self.signature = signature
+        self.slot = slot
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as file:
+                json.dump({"signature": signature, "slot": slot}, file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            error(f"Could not save signature cursor {self.path}: {e}")
+
+
+def new_entries(entries):
+    """Successful entries from a backfill, in slot order."""
+    return sorted((entry for entry in entries if entry.get("err") is None), key=lambda entry: entry.get("slot", 0))
+
+
+class SignatureListener:
+    """
+    Push based detection of new signatures touching `address`.
+
+    Subscribes to logsSubscribe over the RPC websocket and calls `on_signature(signature, slot)`
+    for every successful transaction. On reconnect the gap since the last delivered signature
+    is backfilled over HTTP so nothing is lost while the socket was down.
+    """
+
+    def __init__(self, ws_url, rpc_url, address, on_signature, cursor=None, client=None, commitment="confirmed", max_backoff=60):
+        self.ws_url = ws_url
+        self.rpc_url = rpc_url
+        self.address = address
+        self.on_signature = on_signature
+        self.cursor = cursor
+        self.client = client
+        self.commitment = commitment
+        self.max_backoff = max_backoff
+        self.last_signature = cursor.signature if cursor else None
+        self.last_slot = cursor.slot if cursor else 0
+        self._seen = set()
+        self._seen_order = deque(maxlen=5000)
+
+    def _deliver(self, signature, slot):
+        if signature in self._seen:
+            return
+        if len(self._seen_order) == self._seen_order.maxlen:
+            self._seen.discard(self._seen_order[0])
+        self._seen_order.append(signature)
+        self._seen.add(signature)
+        if slot >= self.last_slot:
+            self.last_slot = slot
+            self.last_signature = signature
+        self.on_signature(signature, slot)
+        if self.cursor:
+            self.cursor.advance(signature, slot)
+
+    async def _backfill(self, until, from_slot):
+        try:
+            if self.client:
+                entries = await backfill_signatures(self.client, self.rpc_url, self.address, until=until)
+            else:
+                async with httpx.AsyncClient() as client:
+                    entries = await backfill_signatures(client, self.rpc_url, self.address, until=until)
+            missed = [entry for entry in new_entries(entries) if entry.get("slot", 0) >= from_slot]
+            if missed:
+                warn(f"Backfilled {len(missed)} signatures missed since the last delivered one")
+            for entry in missed:
+                self._deliver(entry["signature"], entry.get("slot", 0))
+        except Exception as e:
+            error(f"Error backfilling signatures after reconnect: {e}")
+
+    async def _subscribe(self, ws):
+        await ws.send(json.dumps({
+            "jsonrpc": "2.0",
+            "id": 1,
+            "method": "logsSubscribe",
+            "params": [{"mentions": [self.address]}, {"commitment": self.commitment}]
+        }))
+        while True:
+            message = json.loads(await ws.recv())
+            if message.get("id") == 1:
+                if "error" in message:
+                    raise RuntimeError(message["error"].get("message", message["error"]))
+                return message["result"]
+
+    async def run(self):
+        backoff_delay = 1
+        while True:
+            try:
+                async with websockets.connect(self.ws_url, ping_interval=20, ping_timeout=20, max_size=None) as ws:
+                    subscription = await self._subscribe(ws)
+                    info(f"Subscribed to logs for {self.address} (subscription {subscription})")
+                    backoff_delay = 1
+                    # Subscribe before backfilling so the two windows overlap instead of leaving a hole.
+                    if self.last_signature:
+                        asyncio.create_task(self._backfill(self.last_signature, self.last_slot))
+                    async for raw in ws:
+                        message = json.loads(raw)
+                        if message.get("method") != "logsNotification":
+                            continue
+                        result = message["params"]["result"]
+                        if result["value"].get("err") is not None:
+                            continue
+                        self._deliver(result["value"]["signature"], result["context"]["slot"])
+                warn("Websocket closed by server, reconnecting...")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                warn(f"Websocket error: {e}, reconnecting in {backoff_delay} seconds...")
+                await asyncio.sleep(backoff_delay)
+                backoff_delay = min(backoff_delay * 2, self.max_backoff)
@@ -0,0 +1,55 @@
+import time
+import asyncio
+from logger import info, warn
+
+
+class LoopLagMonitor:
+    """
+    Periodically measures how late the event loop wakes a sleeping probe.
+
+    Any blocking call inside a coroutine shows up as scheduling delay. Delays are counted in a
+    histogram that is logged every `report_every` seconds, and single stalls above
+    `warn_threshold` are reported right away.
+    """
+
+    buckets = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 5)
+
+    def __init__(self, interval=0.5, report_every=300, warn_threshold=0.25):
+        self.interval = interval
+        self.report_every = report_every
+        self.warn_threshold = warn_threshold
+        self.reset()
+
+    def reset(self):
+        self.histogram = [0] * (len(self.buckets) + 1)
+        self.samples = 0
+        self.max_lag = 0.0
+
+    def record(self, lag):
+        for index, bound in enumerate(self.buckets):
+            if lag <= bound:
+                break
+        else:
+            index = len(self.buckets)
+        self.histogram[index] += 1
+        self.samples += 1
+        self.max_lag = max(self.max_lag, lag)
+        if lag > self.warn_threshold:
+            warn(f"Event loop blocked for {lag * 1000:.0f}ms")
+
+    def report(self):
+        labels = [f"<={bound * 1000:g}ms" for bound in self.buckets] + [f">{self.buckets[-1] * 1000:g}ms"]
+        counts = ", ".join(f"{label}: {count}" for label, count in zip(labels, self.histogram) if count)
+        info(f"Event loop lag over {self.samples} probes (max {self.max_lag * 1000:.1f}ms) - {counts}")
+
+    async def run(self):
+        last_report = time.monotonic()
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            self.record(max(now - expected, 0.0))
+            if now - last_report >= self.report_every:
+                self.report()
+                self.reset()
+                last_report = now
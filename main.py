@@ -1,34 +1,67 @@
 import os
 import sys
 import json
-import requests
+import time
 import asyncio
-from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey # type: ignore
-from solana.exceptions import SolanaRpcException
 from solders.signature import Signature #type: ignore
-import httpx, httpcore
-import asyncpg
+import httpx
 import random, string
+from functools import partial
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
 from logger import error, info, warn
-from sklearn.metrics import classification_report, roc_auc_score
+from http_pool import HttpPool
+from rate_limiter import RateLimiter
+from loop_monitor import LoopLagMonitor
+from rpc_batch import rpc_batch
+from wallet_cache import WalletCache
+from single_flight import SingleFlight
+from pipeline import Stage, run_stages
+from holders import EXCLUDED_OWNERS, TOKEN_PROGRAM, TOKEN_2022_PROGRAM, aggregate_by_owner, decode_token_accounts, holder_stats, owner_addresses, owner_mask, token_accounts_request
+from db import Database
+from labeler import OutcomeLabeler
+from training_data import TrainingDataLoader
+from pnl import combine_totals, merge_totals, profit_counts, to_token_trades, trade_totals, verdict_settled
+from market_watcher import MarketWatcher
+from listener import SignatureCursor, SignatureListener, backfill_signatures, new_entries
+from features import FeatureSpec
+from model_store import ModelStore
+from drift import DriftMonitor
+from retraining import RetrainScheduler, comparison_split, holdout_auc, train_candidate
+from inference import PredictionService
+from concurrent.futures import ProcessPoolExecutor
 from xgboost import XGBClassifier
-from sklearn.metrics import classification_report, roc_auc_score
-from sklearn.model_selection import GridSearchCV, StratifiedKFold
-from sklearn.metrics import classification_report, roc_auc_score, make_scorer
 
 class BotMain:
     def __init__(self):
         try:
             self.config = self.load_config()
-            self.solana_client = AsyncClient(self.config['rpc'])
             self.rpc_url = self.config['rpc']
             self.webhooks = self.config['webhooks']
             self.addy_pf_bonding_curve = "39azUYFWPz3VHgKCf3VChUwbpURdCHRxjWVowf5jUJjg"
+            self.pnl_max_rows = self.config.get('pnl_max_rows', 200000)
+            self.profit_history = {"max_transactions": 1000, "max_seconds": 15, "confidence_z": 1.96, **self.config.get('profit_history', {})}
+            self.profit_stats = {}
+            self.excluded_holders = EXCLUDED_OWNERS | {self.addy_pf_bonding_curve} | set(self.config.get('excluded_holders', []))
             self.helius_apikey = self.config['helius_apikey']
             self.birdeye_apikey = self.config['birdeye_apikey']
+            self.detection_mode = self.config.get('detection_mode', 'websocket')
+            self.ws_url = self.config.get('ws_url') or self.rpc_url.replace("https://", "wss://").replace("http://", "ws://")
+            self.rate_limiter = RateLimiter(self.config.get('rate_limits'))
+            self.http = HttpPool(self.config.get('http'), self.rate_limiter)
+            self.http.route(self.rpc_url, "rpc")
+            self.http.route("https://mainnet.helius-rpc.com", "helius_rpc")
+            self.http.route("https://api.helius.xyz", "helius_api")
+            self.http.route("https://public-api.birdeye.so", "birdeye")
+            self.http.route("https://frontend-api-v2.pump.fun", "pumpfun")
+            self.loop_monitor = LoopLagMonitor(**self.config.get('loop_monitor', {}))
+            self.wallet_cache = WalletCache(**self.config.get('wallet_cache', {"path": "wallet_cache.db"}))
+            self.single_flight = SingleFlight()
+            self.db = Database(**self.config.get('database', {}))
+            self.market_watcher = MarketWatcher(self.http, self.birdeye_apikey, **self.config.get('market_watcher', {}))
+            self.labeler = OutcomeLabeler(self.monitor_coin, self.update_coin_outcome)
+            self.signature_cursor = SignatureCursor(self.config.get('cursor_file', 'signature_cursor.json'))
         except Exception as e:
             error(f"Error initializing BotMain: {e}")
 
@@ -49,60 +82,102 @@ class BotMain:
         try:
             self.class_b_instance = class_b_instance
             warn("Bot is starting...")
-            await self.monitor_new_signatures()
+            asyncio.create_task(self.loop_monitor.run())
+            asyncio.create_task(self.db.run())
+            asyncio.create_task(self.market_watcher.run())
+            asyncio.create_task(self.restore_pending_labels())
+            if self.detection_mode == "websocket":
+                await self.listen_new_signatures()
+            else:
+                await self.monitor_new_signatures()
         except Exception as e:
             error(f"Error running bot: {e}")
 
+    async def close(self):
+        warn("Bot is shutting down...")
+        await self.db.close()
+        await self.http.close()
+        self.wallet_cache.close()
+
+    async def rpc_call(self, method, params):
+        """JSON-RPC call to the configured RPC, through the shared pool and its rate limit."""
+        response = await self.http.post(
+            self.rpc_url,
+            headers={"Content-Type": "application/json"},
+            json={"jsonrpc": "2.0", "id": "1", "method": method, "params": params},
+            timeout=30
+        )
+        response.raise_for_status()
+        data = response.json()
+        if "error" in data:
+            raise RuntimeError(data["error"].get("message", data["error"]))
+        return data["result"]
+
+    def dispatch_signature(self, signature, slot=None):
+        info(f"New Signature Found: {signature}")
+        task_number = random.randint(10000, 99999)
+        warn(f"Creating task {task_number} for signature: {signature}")
+        asyncio.create_task(self.handle_new_signature(signature, task_number))
+
+    async def listen_new_signatures(self):
+        try:
+            listener = SignatureListener(
+                self.ws_url,
+                self.rpc_url,
+                self.addy_pf_bonding_curve,
+                self.dispatch_signature,
+                cursor=self.signature_cursor,
+                client=self.http
+            )
+            warn("Listening for new signatures over websocket...")
+            await listener.run()
+        except Exception as e:
+            error(f"Error listening for new signatures - {e}")
 
     async def monitor_new_signatures(self):
         try:
-            signature = None
             backoff_delay = 2
             max_backoff = 60
             url =f"https://mainnet.helius-rpc.com/?api-key={self.helius_apikey}"
 
             while True:
                 try:
-                    response = requests.post(
-                        url,
-                        headers={"Content-Type":"application/json"},
-                        json={"jsonrpc":"2.0","id":"1","method":"getSignaturesForAddress","params":[self.addy_pf_bonding_curve,{"limit":1}]}
-                    )
-                    
-                except SolanaRpcException as ex:
-                    if ex.__cause__ and isinstance(ex.__cause__, httpx.HTTPStatusError):
-                        if ex.__cause__.response.status_code == 429:
-                            warn(
-                                f"Got 429 Too Many Requests, backing off for {backoff_delay} seconds..."
-                            )
-                            await asyncio.sleep(backoff_delay)
-                            backoff_delay = min(backoff_delay * 2, max_backoff)
-                            continue
-                    raise
-
-                except httpcore.ReadTimeout:
+                    if self.signature_cursor.signature:
+                        entries = await backfill_signatures(self.http, url, self.addy_pf_bonding_curve, until=self.signature_cursor.signature)
+                    else:
+                        # First start without a saved cursor: anchor on the newest signature.
+                        entries = await backfill_signatures(self.http, url, self.addy_pf_bonding_curve, page_size=1)
+                except httpx.HTTPStatusError as ex:
+                    if ex.response.status_code == 429:
+                        warn(
+                            f"Got 429 Too Many Requests, backing off for {backoff_delay} seconds..."
+                        )
+                    else:
+                        warn(f"Got {ex.response.status_code} while polling signatures, backing off for {backoff_delay} seconds...")
+                    await asyncio.sleep(backoff_delay)
+                    backoff_delay = min(backoff_delay * 2, max_backoff)
+                    continue
+
+                except (httpx.TimeoutException, httpx.TransportError, RuntimeError) as ex:
                     warn(
-                        f"Got ReadTimeout, backing off for {backoff_delay} seconds..."
+                        f"Got {ex.__class__.__name__} while polling signatures, backing off for {backoff_delay} seconds..."
                     )
                     await asyncio.sleep(backoff_delay)
                     backoff_delay = min(backoff_delay * 2, max_backoff)
                     continue
- 
+
                 backoff_delay = 2
-                response = response.json()
-                if response["result"]:
-                    new_signature = response["result"][0]["signature"]
-                    if signature != new_signature:
-                        signature = new_signature
-                        info(f"New Signature Found: {signature}")
-                        task_number = random.randint(10000, 99999)
-                        warn(f"Creating task {task_number} for signature: {signature}")
-                        asyncio.create_task(self.handle_new_signature(signature, task_number))
-                    else:
-                        warn("Monitoring new signatures...")
+                if not self.signature_cursor.signature and entries:
+                    self.signature_cursor.advance(entries[-1]["signature"], entries[-1].get("slot", 0))
+                    info(f"Starting from signature: {self.signature_cursor.signature}")
+                elif entries:
+                    for entry in new_entries(entries):
+                        self.dispatch_signature(entry["signature"], entry.get("slot"))
+                        self.signature_cursor.advance(entry["signature"], entry.get("slot", 0))
+                    # Failed transactions still move the cursor so they are not paged again.
+                    self.signature_cursor.advance(entries[-1]["signature"], max(entry.get("slot", 0) for entry in entries))
                 else:
-                    warn(response.json())
-                    await asyncio.sleep(5)
+                    warn("Monitoring new signatures...")
                 await asyncio.sleep(2)
 
         except Exception as e:
@@ -111,26 +186,60 @@ class BotMain:
     async def handle_new_signature(self, signature, task_number):
         coin = {}
         self.newcoin = ""
-        signature = Signature.from_string(signature)
+        signature = str(Signature.from_string(signature))
+        transaction = None
         try:
             warn(f"{task_number} - Handling new signature in a separate thread: {signature}")
-            response = await self.solana_client.get_transaction(signature, encoding="json", max_supported_transaction_version=0)
-            if response.value and response.value.transaction.meta.pre_token_balances:
-                token_address = response.value.transaction.meta.pre_token_balances[0].mint
+            # Signatures arrive as soon as they are confirmed, the transaction can take a moment to be served.
+            for attempt in range(4):
+                transaction = await self.rpc_call(
+                    "getTransaction",
+                    [signature, {"encoding": "json", "maxSupportedTransactionVersion": 0, "commitment": "confirmed"}]
+                )
+                if transaction:
+                    break
+                await asyncio.sleep(attempt + 1)
+            if transaction and transaction["meta"].get("preTokenBalances"):
+                token_address = transaction["meta"]["preTokenBalances"][0]["mint"]
                 if token_address == self.newcoin:
                     warn(f"{task_number} - Token already in database")
                 if "pump" in str(token_address):
                     info(f"{task_number} - New token found: {token_address}")
                     self.newcoin = token_address
-                    coin['token_address'] = response.value.transaction.meta.pre_token_balances[0].mint
-                    await self.get_token_name(task_number, coin)
+                    coin['token_address'] = token_address
+                    await self.analyze_coin(task_number, coin)
                 else:
                     warn(f"{task_number} - Token not found: {token_address}")
             else:
                 error(f"{task_number} - No token found in the transaction metadata.")
         except Exception as e:
             error(f"{task_number} - Invalid signature: {e}")
-            warn(response)
+            warn(transaction)
+
+    async def analyze_coin(self, task_number, coin):
+        """
+        Collect every feature of a new coin. Lookups that only need the token address (Birdeye overview,
+        creator, holder snapshot) start together, the rest start as soon as their inputs are ready.
+        """
+        async def blacklist():
+            coin["blacklist"] = await self.check_blacklist(task_number, coin)
+            return True
+
+        stages = [
+            Stage("token_info", partial(self.get_token_name, task_number, coin)),
+            Stage("creator_wallet", partial(self.get_creator_wallet, task_number, coin)),
+            Stage("holders", partial(self.get_holders, task_number, coin)),
+            Stage("blacklist", blacklist, requires=["token_info"]),
+            Stage("creator_tx", partial(self.get_creator_tx, task_number, coin), requires=["creator_wallet"]),
+            Stage("owner_coins", partial(self.check_owner_coins, task_number, coin), requires=["creator_wallet"]),
+            Stage("holder_distribution", partial(self.holder_distribution, task_number, coin), requires=["holders", "creator_wallet"]),
+            Stage("holder_scores", partial(self.run_all_tasks, task_number, coin), requires=["holder_distribution"]),
+        ]
+        results, timings = await run_stages(task_number, stages)
+        coin.pop("holders", None)
+        coin.pop("holder_accounts", None)
+        if all(results.values()):
+            await self.finalize_coin(task_number, coin)
 
     async def get_token_name(self,task_number, coin):
         coin["website_check"] = False
@@ -145,54 +254,51 @@ class BotMain:
         try:
             while True:
                 info(f"{task_number} - Getting token info")
-                async with httpx.AsyncClient() as client:
+                try:
+                    response = await self.http.get(url=url, headers=headers, timeout=15)
                     try:
-                        response = await client.get(url=url, headers=headers, timeout=15)
-                        try:
-                            data = json.loads(response.content.decode("utf-8",errors="replace"))
-                        except json.JSONDecodeError as e:
-                            error(f"JSON decoding error: {e}")
-                            await asyncio.sleep(15)
-                        if response.status_code == 500:
-                            error(f"{task_number} - Internal server error")
-                            await asyncio.sleep(5)
-                        if response.status_code != 200:
-                            error(f"{task_number} - Error getting token info: {response.status_code}")
-                            await asyncio.sleep(5)
-                        else:
-                            if data['data']:
-                                if data['data']['extensions']:
-                                    if 'twitter' in data['data']['extensions']:
-                                        coin["twitter"] = data['data']['extensions']["twitter"]
-                                        coin["twitter_check"] = True
-                                    if 'telegram' in data['data']['extensions']:
-                                        coin["telegram"] = data['data']['extensions']["telegram"]
-                                        coin["telegram_check"] = True
-                                    if 'website' in data['data']['extensions']:
-                                        coin["website_check"] = True
-                                        coin["website"] = data['data']['extensions']["website"]
-                                try:
-                                    coin["token_name"] = str(data['data']["symbol"])
-                                except:
-                                    coin["token_name"] = "Unknown"
-                                try:
-                                    coin["token_img"] = data['data']["logoURI"]
-                                except:
-                                    coin["token_img"] = "https://cdn.discordapp.com/attachments/807532576771145749/1331994599438417992/Politics_Inaug_Elon_GettyImages-2194418262.webp?ex=6793a423&is=679252a3&hm=1458ee844cb40326f0d88bc9496019400f01d14fa3bdb06f0305f8acdf159d22&"
-                                info(f"{task_number} - Token Name: {coin['token_name']}")
-                                break
-                            else:                              
-                                break
-                    except (httpx.RequestError, httpx.TimeoutException, Exception) as e:
-                        error(f"{task_number} - Request error: {e}. Retrying...")
-                        warn(Exception)
-                        await asyncio.sleep(5)  # Wait for 3 seconds before retrying
-            try:
-                if coin['token_name']:
-                    await self.get_creator_wallet(task_number,coin)
-            except:
+                        data = json.loads(response.content.decode("utf-8",errors="replace"))
+                    except json.JSONDecodeError as e:
+                        error(f"JSON decoding error: {e}")
+                        await asyncio.sleep(15)
+                    if response.status_code == 500:
+                        error(f"{task_number} - Internal server error")
+                        await asyncio.sleep(5)
+                    if response.status_code != 200:
+                        error(f"{task_number} - Error getting token info: {response.status_code}")
+                        await asyncio.sleep(5)
+                    else:
+                        if data['data']:
+                            if data['data']['extensions']:
+                                if 'twitter' in data['data']['extensions']:
+                                    coin["twitter"] = data['data']['extensions']["twitter"]
+                                    coin["twitter_check"] = True
+                                if 'telegram' in data['data']['extensions']:
+                                    coin["telegram"] = data['data']['extensions']["telegram"]
+                                    coin["telegram_check"] = True
+                                if 'website' in data['data']['extensions']:
+                                    coin["website_check"] = True
+                                    coin["website"] = data['data']['extensions']["website"]
+                            try:
+                                coin["token_name"] = str(data['data']["symbol"])
+                            except:
+                                coin["token_name"] = "Unknown"
+                            try:
+                                coin["token_img"] = data['data']["logoURI"]
+                            except:
+                                coin["token_img"] = "https://cdn.discordapp.com/attachments/807532576771145749/1331994599438417992/Politics_Inaug_Elon_GettyImages-2194418262.webp?ex=6793a423&is=679252a3&hm=1458ee844cb40326f0d88bc9496019400f01d14fa3bdb06f0305f8acdf159d22&"
+                            info(f"{task_number} - Token Name: {coin['token_name']}")
+                            break
+                        else:                              
+                            break
+                except (httpx.RequestError, httpx.TimeoutException, Exception) as e:
+                    error(f"{task_number} - Request error: {e}. Retrying...")
+                    warn(Exception)
+                    await asyncio.sleep(5)  # Wait for 3 seconds before retrying
+            if not coin.get('token_name'):
                 error(f"{task_number} - No data found for token, skipping.")
-                pass
+                return False
+            return True
 
         except Exception as e:
             error(f"{task_number} - Error getting token info: {e}")
@@ -208,50 +314,45 @@ class BotMain:
         try:
             while True:
                 info(f"{task_number} - Getting creator wallet")
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url=url, headers=headers, timeout=15)
-                    if response.status_code == 500:
-                        error(f"{task_number} - Internal server error")
-                        await asyncio.sleep(1)
-                    elif response.status_code != 200:
-                        error(f"{task_number} - Error getting token info: {response.status_code}")
-                    else:
-                        data = response.json()
-                        if data['data'] == None:
-                            if counter < 5:
-                                counter += 1
-                                error(f"{task_number} - No creator found for the token, retrying...")
-                                await asyncio.sleep(5)
-                            else:
-                                break
-                        if data and 'data' in data and 'owner' in data['data']:
-                            coin["creator_wallet"] = data['data']['owner']
-                            info(f"{task_number} - Creator Wallet: {coin['creator_wallet']}")
-                            break
-                        else:
-                            error(f"{task_number} - Unexpected response format")
-                            warn(data)
-                            await asyncio.sleep(15)
-            try:
-                if coin['creator_wallet']:
-                    await self.get_creator_tx(task_number,coin)
+                response = await self.single_flight.do(("GET", url), self.http.get, url=url, headers=headers, timeout=15)
+                if response.status_code == 500:
+                    error(f"{task_number} - Internal server error")
+                    await asyncio.sleep(1)
+                elif response.status_code != 200:
+                    error(f"{task_number} - Error getting token info: {response.status_code}")
                 else:
-                    pass
-            except:
+                    data = response.json()
+                    if data['data'] == None:
+                        if counter < 5:
+                            counter += 1
+                            error(f"{task_number} - No creator found for the token, retrying...")
+                            await asyncio.sleep(5)
+                        else:
+                            break
+                    if data and 'data' in data and 'owner' in data['data']:
+                        coin["creator_wallet"] = data['data']['owner']
+                        info(f"{task_number} - Creator Wallet: {coin['creator_wallet']}")
+                        break
+                    else:
+                        error(f"{task_number} - Unexpected response format")
+                        warn(data)
+                        await asyncio.sleep(15)
+            if not coin.get('creator_wallet'):
                 error(f"{task_number} - No data creator wallet found for token, skipping.")
-                pass
+                return False
+            return True
         except Exception as e:
             error(f"{task_number} - Error getting creator wallet: {e}")
 
     async def get_creator_tx(self,task_number,coin):
         coin["creator_new_wallet"] = False
         coin["profit_owner"] = False
-        creator_wallet = Pubkey.from_string(coin["creator_wallet"])
+        creator_wallet = str(Pubkey.from_string(coin["creator_wallet"]))
         try:
             info(f"{task_number} - Getting creator transactions")
-            response = await self.solana_client.get_signatures_for_address(creator_wallet, limit=1000)
-            if response.value:
-                if len(response.value) > 400:
+            signatures = await self.rpc_call("getSignaturesForAddress", [creator_wallet, {"limit": 1000}])
+            if signatures:
+                if len(signatures) > 400:
                     info(f"{task_number} - Wallet got enough transactions")
                     coin["creator_new_wallet"] = False
                 else:
@@ -259,82 +360,20 @@ class BotMain:
                     coin["creator_new_wallet"] = True
                 if coin["creator_new_wallet"]:
                     coin["profit_owner"] = await self.check_creator_profit(task_number, coin)
-                await self.check_owner_coins(task_number, coin)
+                return True
         except Exception as e:
             error(f"{task_number} - Error getting creator transaction: {e}")
 
     async def check_creator_profit(self,task_number, coin):
         try:
             info(f"{task_number}- Checking profit for owner wallet")
-            async with httpx.AsyncClient() as client:
-                response = requests.get(
-                    f"https://api.helius.xyz/v0/addresses/{str(coin['creator_wallet'])}/transactions?api-key={self.helius_apikey}",
-                    headers={},
-                )
-                if response.status_code != 200:
-                    error(f"{task_number} - Error checking profit in owner wallet: {response.status_code}")
-
-                transactions = response.json()
-
-                if not transactions:
-                    info(f"{task_number} - No transactions found for owner wallet")
-
-                token_trades = {}
-
-                # Loop through each transaction
-                for tx  in transactions:
-                    if "SWAP" in tx["type"]:
-                        token_transfers = tx.get("tokenTransfers", [])
-                        native_transfers = tx.get("nativeTransfers", [])
-                        for transfer in token_transfers:
-                            mint = transfer["mint"]
-                            token_amount = transfer["tokenAmount"] / (10 ** transfer.get("mintDecimals", 6))  
-                            
-                            
-                            if transfer["toUserAccount"] == coin['creator_wallet']:  
-                                sol_spent = sum(
-                                    t["amount"] / 1e9 for t in native_transfers if t["fromUserAccount"] == coin['creator_wallet']
-                                )  
-                                if mint not in token_trades:
-                                    token_trades[mint] = {"bought": [], "sold": []}
-                                token_trades[mint]["bought"].append({"amount": token_amount, "cost": sol_spent})
-                            
-                            elif transfer["fromUserAccount"] == coin['creator_wallet']:  
-                                sol_received = sum(
-                                    t["amount"] / 1e9 for t in native_transfers if t["toUserAccount"] == coin['creator_wallet']
-                                )  
-                                if mint not in token_trades:
-                                    token_trades[mint] = {"bought": [], "sold": []}
-                                token_trades[mint]["sold"].append({"amount": token_amount, "revenue": sol_received})
-
-
-                token_profits = {}
-                total_profit = 0
-                profitable_coins = 0
-                total_coins = len(token_trades)
-                for mint, trades in token_trades.items():
-                    total_cost = sum(b["cost"] for b in trades["bought"])
-                    total_revenue = sum(s["revenue"] for s in trades["sold"])
-                    total_bought = sum(b["amount"] for b in trades["bought"])
-                    total_sold = sum(s["amount"] for s in trades["sold"])
-                    profit = total_revenue - total_cost
-                    if profit > 0:
-                        profitable_coins += 1
-                    total_profit += profit
-                    token_profits[mint] = {
-                        "total_bought": total_bought,
-                        "total_sold": total_sold,
-                        "total_cost": total_cost,
-                        "total_revenue": total_revenue,
-                        "profit": profit,
-                    }
-                profit_percentage = (profitable_coins / total_coins * 100) if total_coins > 0 else 0
-                if profit_percentage > 55:
-                    info(f"{task_number}- Owner wallet is profitable")
-                    return True
-                else:
-                    info(f"{task_number}- Owner wallet is not profitable")
-                    return False
+            wallet = coin['creator_wallet']
+            if await self.single_flight.do(("profitable", wallet), self.wallet_profitable, task_number, wallet):
+                info(f"{task_number}- Owner wallet is profitable")
+                return True
+            else:
+                info(f"{task_number}- Owner wallet is not profitable")
+                return False
         except Exception as e:
             error(f"{task_number} - Error checking owner wallet profit: {e}")
 
@@ -342,83 +381,63 @@ class BotMain:
         coin["oldcoins"] = False
         try:
             info(f"{task_number} - Checking if dev created other coins.")
-            async with httpx.AsyncClient() as client:
-                response = await client.get(f"https://frontend-api-v2.pump.fun/balances/{coin['creator_wallet']}?limit=50&offset=0&minBalance=-1")
-                data = response.json()
-                if len(data) > 1:
-                    coin["oldcoins"] = True
-                    info(f"{task_number} - Dev created other coins: {(len(data))}")
-                else:
-                    coin["oldcoins"] = False
-                    info(f"{task_number} - Dev never created any other coins")
-                await self.get_holders(task_number, coin)
+            response = await self.http.get(f"https://frontend-api-v2.pump.fun/balances/{coin['creator_wallet']}?limit=50&offset=0&minBalance=-1")
+            data = response.json()
+            if len(data) > 1:
+                coin["oldcoins"] = True
+                info(f"{task_number} - Dev created other coins: {(len(data))}")
+            else:
+                coin["oldcoins"] = False
+                info(f"{task_number} - Dev never created any other coins")
+            return True
         except Exception as e:
             error(f"{task_number} - Error checking dev coins: {e}")
 
     async def get_holders(self,task_number,coin):
         try:
             info(f"{task_number} - Getting holders")
-            total_supply = 0
-            holders = []
-            owner_supply = 0
-            payload_getholders = {
-                "jsonrpc": "2.0",
-                "id": 1,
-                "method": "getProgramAccounts",
-                "params": [
-                    "TokenkegQfeZyiNwAJbNbGKPFXCWuBvf9Ss623VQ5DA",
-                    {
-                        "encoding": "jsonParsed",
-                        "filters": [
-                            {"dataSize": 165},
-                            {
-                                "memcmp": {
-                                    "offset": 0,
-                                    "bytes": str(coin['token_address'])
-                                }
-                            }
-                        ]
-                    }
-                ]
-            }
-
-            async with httpx.AsyncClient() as client:
-                response = await client.post(self.rpc_url, json=payload_getholders, timeout=30)
-                data = response.json()
-                for account in data["result"]:
-                    if self.addy_pf_bonding_curve not in account["account"]["data"]["parsed"]["info"]["owner"]:
-                        amount = int(account["account"]["data"]["parsed"]["info"]["tokenAmount"]["amount"])
-                        if amount > 0:
-                            total_supply += amount
-                            holders.append({
-                                "owner": account["account"]["data"]["parsed"]["info"]["owner"],
-                                "amount": amount
-                            })
-                        if str(coin['creator_wallet']) in account["account"]["data"]["parsed"]["info"]["owner"]:
-                            owner_supply = int(account["account"]["data"]["parsed"]["info"]["tokenAmount"]["amount"])
-                if total_supply > 0:
-                    coin["owner_percentage"] = round((owner_supply/total_supply)*100,2)
-                    coin["holder_number"] = len(holders)
-                    holders = sorted(holders, key=lambda x: x["amount"], reverse=True)
-                    top_10_supply = sum(holder["amount"] for holder in holders[:10])
-                    coin["top10_wallets"] = {holder["owner"]: 0 for holder in holders[:10]}
-                    coin["percentage_top_10"] = (top_10_supply / (total_supply - owner_supply)) * 100 if total_supply > 0 else 0
-
-                    info(f"{task_number} - Owner Supply: {coin['owner_percentage']}")
-                    info(f"{task_number} - Holders: {len(holders)}")
-                    info(f"{task_number} - Top 10 Supply: {round(top_10_supply,1)}%")
-                else:
-                    coin["owner_percentage"] = 0
-                    coin["percentage_top_10"] = 0
-                    coin["holder_number"] = 0
-
-            info(f"{task_number} - Top 10 Holder: {coin['percentage_top_10']}%")
-            await self.run_all_tasks(task_number,coin, holders)
+            responses = await asyncio.gather(*(
+                self.http.post(self.rpc_url, json=token_accounts_request(program, coin['token_address']), timeout=30)
+                for program in (TOKEN_PROGRAM, TOKEN_2022_PROGRAM)
+            ))
+            snapshots = [decode_token_accounts(response.json()["result"]) for response in responses]
+            owners = np.concatenate([owners for owners, _ in snapshots])
+            amounts = np.concatenate([amounts for _, amounts in snapshots])
+            owners, amounts = aggregate_by_owner(owners, amounts)
+            keep = (amounts > 0) & ~owner_mask(owners, self.excluded_holders)
+            coin["holder_accounts"] = (owners[keep], amounts[keep])
+            return True
         except Exception as e:
             error(f"{task_number} - Error getting holders: {e}")
 
-    async def run_all_tasks(self,task_number,coin,holders):
+    async def holder_distribution(self,task_number,coin):
+        """Owner share and top 10 concentration, once both the holders and the creator wallet are known."""
+        owners, amounts = coin.pop("holder_accounts")
+        stats = holder_stats(owners, amounts, coin['creator_wallet'])
+        total_supply = stats["total_supply"]
+        owner_supply = stats["owner_supply"]
+        coin["holders"] = owner_addresses(owners)
+        if total_supply > 0:
+            coin["owner_percentage"] = round((owner_supply/total_supply)*100,2)
+            coin["holder_number"] = stats["holder_number"]
+            top_10_supply = stats["top_supply"]
+            coin["top10_wallets"] = {wallet: 0 for wallet in owner_addresses(owners, stats["top_index"])}
+            coin["percentage_top_10"] = (top_10_supply / (total_supply - owner_supply)) * 100 if total_supply > 0 else 0
+
+            info(f"{task_number} - Owner Supply: {coin['owner_percentage']}")
+            info(f"{task_number} - Holders: {coin['holder_number']}")
+            info(f"{task_number} - Top 10 Supply: {round(top_10_supply,1)}%")
+        else:
+            coin["owner_percentage"] = 0
+            coin["percentage_top_10"] = 0
+            coin["holder_number"] = 0
+
+        info(f"{task_number} - Top 10 Holder: {coin['percentage_top_10']}%")
+        return True
+
+    async def run_all_tasks(self,task_number,coin):
         coin["top_holders_good_traders"] = False
+        holders = coin.pop("holders")
         try:
             categories = {
                 ">900":0,
@@ -433,12 +452,7 @@ class BotMain:
                 "<20": 0
             }
             info(f"{task_number} - Running all holders wallets...")
-            #tasks = [asyncio.create_task(self.process_holder(i)) for i in self.holders]
-            max_concurrent_tasks = 30
-            for i in range(0, len(holders), max_concurrent_tasks):
-                batch = [holder["owner"] for holder in holders[i:i + max_concurrent_tasks]]
-                tasks = [asyncio.create_task(self.process_holder(amount, task_number,categories,coin)) for amount in batch]
-                await asyncio.gather(*tasks)
+            await self.score_holders(task_number, holders, categories, coin)
             percentages = {key: (value / len(holders)) * 100 for key, value in categories.items()}
             coin["new_wallets_percentage"] = percentages["<20"] + percentages["20-50"] + percentages["50-100"]
             info(f"{task_number} - New wallets percentage: {coin['new_wallets_percentage']}")
@@ -474,18 +488,32 @@ class BotMain:
                     info(f"{task_number}- Wallet {wallet} is not profitable.")
             
             info(f"{task_number} - Profitable wallets count: {profitable_wallets_count}")
+            self.wallet_cache.log_stats()
+            self.single_flight.log_stats()
+            self.log_profit_stats()
             if profitable_wallets_count > 5:
                 info(f"{task_number} - Top holders are good traders")
                 coin["top_holders_good_traders"] = True
             else:  
                 info(f"{task_number} - Top holders are not good traders")
-            coin["blacklist"] = await self.check_blacklist(task_number,coin)
-            await self.process_data_and_send_to_b(task_number, coin)
-            coin["status"] = await self.monitor_coin(task_number,coin)
-            await self.add_coin_to_db(task_number,coin)
+            return True
         except Exception as e:
             error(f"{task_number} - Error running all tasks: {e}")
 
+    async def finalize_coin(self,task_number,coin):
+        try:
+            # Stored right away with success = NULL, the labeler fills in the outcome later.
+            coin["status"] = None
+            await self.add_coin_to_db(task_number,coin)
+            self.labeler.watch(coin["token_address"], task_number)
+        except Exception as e:
+            error(f"{task_number} - Error finalizing coin: {e}")
+        # Features are kept even when there is no model yet or the prediction fails.
+        try:
+            await self.process_data_and_send_to_b(task_number, coin)
+        except Exception as e:
+            error(f"{task_number} - Error predicting coin: {e}")
+
     async def process_data_and_send_to_b(self, task_number,coin):
         info(f"{task_number} - Sending data to the AI model...")
         data = {
@@ -508,262 +536,240 @@ class BotMain:
         }
         await self.class_b_instance.receive_data_from_a(data)
 
-    async def process_holder(self, i,task_number,categories, coin):
+    async def score_holders(self, task_number, wallets, categories, coin):
+        """Count signatures for every holder with batched JSON-RPC calls spread over a small worker pool."""
+        batch_size = self.config.get('holder_batch_size', 25)
+        queue = asyncio.Queue()
+        for i in range(0, len(wallets), batch_size):
+            queue.put_nowait(wallets[i:i + batch_size])
+
+        async def worker():
+            # Each worker pulls the next batch as soon as its own finishes, no batch waits for the slowest one.
+            while not queue.empty():
+                batch = queue.get_nowait()
+                counts = await self.fetch_signature_counts(task_number, batch)
+                for wallet, count in zip(batch, counts):
+                    self.process_holder(wallet, count, task_number, categories, coin)
+
+        workers = min(self.config.get('holder_concurrency', 4), queue.qsize())
+        await asyncio.gather(*(worker() for _ in range(workers)))
+
+    async def fetch_signature_counts(self, task_number, wallets):
+        """Signature count per wallet, from the cache, from another coin's in-flight lookup or from the RPC."""
+        counts = {wallet: self.wallet_cache.get(wallet, "signature_count") for wallet in wallets}
+        stale = [wallet for wallet, count in counts.items() if count is None]
+        owned, waiting = self.single_flight.claim([("signature_count", wallet) for wallet in stale])
         try:
-            headers={"Content-Type":"application/json"}
-            payload = {
-                "jsonrpc":"2.0",
-                "id":"1",
-                "method":"getSignaturesForAddress",
-                "params":[i]
+            if owned:
+                counts.update(await self.page_signature_counts(task_number, [wallet for _, wallet in owned]))
+        finally:
+            for key in owned:
+                self.single_flight.settle(key, counts.get(key[1]))
+        # Wallets another coin is already fetching: wait for its result instead of asking again.
+        for (_, wallet), future in waiting.items():
+            counts[wallet] = await future
+        return [counts[wallet] for wallet in wallets]
+
+    async def page_signature_counts(self, task_number, wallets):
+        """Batched getSignaturesForAddress paging that only fetches signatures newer than each wallet's stored cursor."""
+        url = f"https://mainnet.helius-rpc.com/?api-key={self.helius_apikey}"
+        max_history = self.config.get('max_history_signatures', 1000)
+        state = {}
+        for wallet in wallets:
+            entry = self.wallet_cache.peek(wallet) or {}
+            cursor = entry.get("signature_cursor")
+            state[wallet] = {
+                "until": cursor,
+                "before": None,
+                "newest": cursor,
+                "count": entry.get("signature_count", 0) if cursor else 0,
+                "fetched": 0
             }
-            async with httpx.AsyncClient() as client:
-                while True:
-                    try:
-                        info(f"{task_number} - Processing holders: {i}")
-                        response = await client.post(f"https://mainnet.helius-rpc.com/?api-key={self.helius_apikey}", json=payload, headers=headers, timeout=15)
-                        data = response.json()
-                        if "Too Many Requests" in str(response):
-                            error(f"{task_number} - Rate limit while processing holder. Retrying...")
-                            await asyncio.sleep(10)  
-                        if response.status_code != 200:
-                            error(f"{task_number} - Status error while processing holder: {response.status_code}")
-                            warn(data)
-                            await asyncio.sleep(10) 
-                        if 'error' in data:
-                            if data['error']['message'] == "Rate limit exceeded":
-                                error(f"{task_number} - Rate limit while processing holder. Retrying...")
-                                await asyncio.sleep(30)
-                            else:
-                                error(f"{task_number} - Error processing holder: {data['error']['message']}")
-                                #print(data)
-                                await asyncio.sleep(10)
-                        try:
-                            result =  data['result']
-                            break
-                        except Exception as e:
-                            error(f"{task_number} - Error processing holders: {e}")
-                            #warn(response.json())
-                            await asyncio.sleep(10)
-                    except Exception as e:
-                        error(f"{task_number} - Error while processing holder {i} - {e}")
-                        warn(response.json())
-                        await asyncio.sleep(10)
-                if i in coin["top10_wallets"]:
-                    coin["top10_wallets"][i] = len(data['result'])
-                if len(data['result']) > 900:
-                    categories[">900"] += 1
-                elif 700 < len(data['result']) < 900:
-                    categories["700-900"] += 1
-                elif 500 < len(data['result']) < 700:
-                    categories["500-700"] += 1
-                elif 400 < len(data['result']) < 500:
-                    categories["400-500"] += 1
-                elif 300 < len(data['result']) < 400:
-                    categories["300-400"] += 1
-                elif 200 < len(data['result']) < 300:
-                    categories["200-300"] += 1
-                elif 100 < len(data['result']) < 200:
-                    categories["100-200"] += 1
-                elif 50 < len(data['result']) < 100:
-                    categories["50-100"] += 1
-                elif 20 < len(data['result']) < 50:
-                    categories["20-50"] += 1
-                else:
-                    categories["<20"] += 0
-        except Exception as e:
-            error(f"{task_number} - Error processing holder {i} - {e}")
+        pending = wallets
+        while pending:
+            calls = []
+            for wallet in pending:
+                options = {"limit": 1000}
+                if state[wallet]["until"]:
+                    options["until"] = state[wallet]["until"]
+                if state[wallet]["before"]:
+                    options["before"] = state[wallet]["before"]
+                calls.append(("getSignaturesForAddress", [wallet, options]))
+            results = await rpc_batch(self.http, url, calls)
+            next_pending = []
+            for wallet, result in zip(pending, results):
+                if result is None:
+                    error(f"{task_number} - Error processing holder {wallet}, skipping")
+                    state.pop(wallet)
+                    continue
+                wallet_state = state[wallet]
+                if result and wallet_state["before"] is None:
+                    wallet_state["newest"] = result[0]["signature"]
+                wallet_state["count"] += len(result)
+                wallet_state["fetched"] += len(result)
+                # Full page: keep paging back towards the cursor, up to max_history_signatures per look.
+                # The default of one page is enough, counts only matter up to the >900 holder category.
+                if len(result) == 1000 and wallet_state["fetched"] < max_history:
+                    wallet_state["before"] = result[-1]["signature"]
+                    next_pending.append(wallet)
+            pending = next_pending
+        self.wallet_cache.set_many({
+            wallet: {
+                "signature_count": wallet_state["count"],
+                "category": self.holder_category(wallet_state["count"]),
+                "signature_cursor": wallet_state["newest"]
+            }
+            for wallet, wallet_state in state.items()
+        })
+        return {wallet: wallet_state["count"] for wallet, wallet_state in state.items()}
+
+    def holder_category(self, count):
+        if count > 900:
+            return ">900"
+        elif 700 < count < 900:
+            return "700-900"
+        elif 500 < count < 700:
+            return "500-700"
+        elif 400 < count < 500:
+            return "400-500"
+        elif 300 < count < 400:
+            return "300-400"
+        elif 200 < count < 300:
+            return "200-300"
+        elif 100 < count < 200:
+            return "100-200"
+        elif 50 < count < 100:
+            return "50-100"
+        elif 20 < count < 50:
+            return "20-50"
+        else:
+            return "<20"
+
+    def process_holder(self, i, count, task_number, categories, coin):
+        info(f"{task_number} - Processing holders: {i}")
+        if count is None:
+            return
+        if i in coin["top10_wallets"]:
+            coin["top10_wallets"][i] = count
+        category = self.holder_category(count)
+        # "<20" is never incremented, those wallets only lower the other percentages.
+        if category != "<20":
+            categories[category] += 1
 
     async def check_profit(self, i,task_number):
         try:
             info(f"{task_number}- Checking profit for wallet: {i}")
-            async with httpx.AsyncClient() as client:
-                while True:
-                    response = requests.get(
-                        f"https://api.helius.xyz/v0/addresses/{i}/transactions?api-key={self.helius_apikey}",
-                        headers={},
-                    )
-                    if response.status_code == 500:
-                        error(f"{task_number} - Error checking profit in wallet {i}: {response.status_code}")
-                        warn(response.json())
-                        await asyncio.sleep(10)
-                    if response.status_code != 200:
-                        error(f"{task_number} - Error checking profit in wallet {i}: {response.status_code}")
-                        warn(response.json())
-                        await asyncio.sleep(10)
-                
-
-                    transactions = response.json()
-
-                    if not transactions:
-                        info(f"{task_number} - No transactions found for wallet: {i}")
-
-                    token_trades = {}
-
-                    # Loop through each transaction
-                    for tx  in transactions:
-                        if "SWAP" in tx["type"]:
-                            token_transfers = tx.get("tokenTransfers", [])
-                            native_transfers = tx.get("nativeTransfers", [])
-                            for transfer in token_transfers:
-                                mint = transfer["mint"]
-                                token_amount = transfer["tokenAmount"] / (10 ** transfer.get("mintDecimals", 6))  
-                                
-                                
-                                if transfer["toUserAccount"] == i:  
-                                    sol_spent = sum(
-                                        t["amount"] / 1e9 for t in native_transfers if t["fromUserAccount"] == i
-                                    )  
-                                    if mint not in token_trades:
-                                        token_trades[mint] = {"bought": [], "sold": []}
-                                    token_trades[mint]["bought"].append({"amount": token_amount, "cost": sol_spent})
-                                
-                                elif transfer["fromUserAccount"] == i:  
-                                    sol_received = sum(
-                                        t["amount"] / 1e9 for t in native_transfers if t["toUserAccount"] == i
-                                    )  
-                                    if mint not in token_trades:
-                                        token_trades[mint] = {"bought": [], "sold": []}
-                                    token_trades[mint]["sold"].append({"amount": token_amount, "revenue": sol_received})
-
-                    token_profits = {}
-                    total_profit = 0
-                    profitable_coins = 0
-                    total_coins = len(token_trades)
-                    for mint, trades in token_trades.items():
-                        total_cost = sum(b["cost"] for b in trades["bought"])
-                        total_revenue = sum(s["revenue"] for s in trades["sold"])
-                        total_bought = sum(b["amount"] for b in trades["bought"])
-                        total_sold = sum(s["amount"] for s in trades["sold"])
-                        profit = total_revenue - total_cost
-                        if profit > 0:
-                            profitable_coins += 1
-                        total_profit += profit
-                        token_profits[mint] = {
-                            "total_bought": total_bought,
-                            "total_sold": total_sold,
-                            "total_cost": total_cost,
-                            "total_revenue": total_revenue,
-                            "profit": profit,
-                        }
-                    break
-                profit_percentage = (profitable_coins / total_coins * 100) if total_coins > 0 else 0
-                if profit_percentage > 55:
-                    return True
-                else:
-                    return False
+            return await self.single_flight.do(("profitable", i), self.wallet_profitable, task_number, i)
         except Exception as e:
             error(f"{task_number} - Error checking profit: {e}")
-        
-    async def connect_to_db(self,task_number):
-        try:
-            conn = await asyncpg.connect(
-                user='',
-                password='',
-                database='',
-                host='',
-                port=number
-            )
-            return conn
-        except Exception as e:
-            error(f"{task_number} - Errore durante la connessione al database: {e}")
-            return None
+
+    async def wallet_profitable(self, task_number, wallet):
+        """True when more than 55% of the mints the wallet swapped were closed in profit, read page by page until settled or out of budget."""
+        cached = self.wallet_cache.get(wallet, "profitable")
+        if cached is not None:
+            return cached
+        entry = self.wallet_cache.peek(wallet) or {}
+        cursor = entry.get("tx_cursor")
+        token_trades = {mint: list(totals) for mint, totals in entry.get("token_trades", {}).items()} if cursor else {}
+
+        totals = merge_totals(trade_totals({}), {wallet: token_trades})
+        newest = None
+        pages = 0
+        fetched = 0
+        reason = "incremental" if cursor else "full history"
+        started = time.monotonic()
+        async for page in self.wallet_transaction_pages(wallet, until=cursor):
+            pages += 1
+            fetched += len(page)
+            newest = newest or page[0]["signature"]
+            totals = combine_totals(totals, trade_totals({wallet: page}, self.pnl_max_rows))
+            # Incremental looks stop on the same rules, older unread pages are skipped like a long history's tail.
+            if verdict_settled(*profit_counts(totals, wallet), 0.55, self.profit_history["confidence_z"]):
+                reason = "settled"
+                break
+            if fetched >= self.profit_history["max_transactions"] or time.monotonic() - started >= self.profit_history["max_seconds"]:
+                reason = "budget"
+                break
+        if not newest and not cursor:
+            info(f"{task_number} - No transactions found for wallet: {wallet}")
+
+        profitable_coins, total_coins = profit_counts(totals, wallet)
+        profit_percentage = (profitable_coins / total_coins * 100) if total_coins > 0 else 0
+        stats = self.profit_stats.setdefault(reason, {"verdicts": 0, "pages": 0})
+        stats["verdicts"] += 1
+        stats["pages"] += pages
+        info(f"{task_number} - Wallet {wallet}: {profit_percentage:.0f}% of {total_coins} mints profitable, {pages} pages ({reason})")
+        self.wallet_cache.set(
+            wallet,
+            profitable=profit_percentage > 55,
+            token_trades=to_token_trades(totals).get(wallet, {}),
+            tx_cursor=newest or cursor
+        )
+        return profit_percentage > 55
+
+    async def wallet_transaction_pages(self, wallet, until=None):
+        """Pages of Helius enhanced transactions, newest first, walked back with `before` until `until` or the end of the history."""
+        url = f"https://api.helius.xyz/v0/addresses/{wallet}/transactions?api-key={self.helius_apikey}"
+        before = None
+        while True:
+            params = {"limit": 100}
+            if until:
+                params["until"] = until
+            if before:
+                params["before"] = before
+            response = await self.http.get(url, params=params)
+            if response.status_code != 200:
+                raise RuntimeError(f"Helius returned {response.status_code}: {response.text[:200]}")
+            page = response.json()
+            if page:
+                yield page
+            if len(page) < 100:
+                return
+            before = page[-1]["signature"]
+
+    def log_profit_stats(self):
+        summary = ", ".join(
+            f"{reason} {stats['verdicts']} ({stats['pages'] / stats['verdicts']:.1f} pages each)"
+            for reason, stats in self.profit_stats.items()
+        )
+        if summary:
+            info(f"Wallet profit verdicts: {summary}")
 
     async def add_coin_to_db(self,task_number, coin):
-        conn = await self.connect_to_db(task_number)
         info(f"{task_number} - Creating a random id")
         characters = string.ascii_letters + string.digits
         random_id = ''.join(random.choices(characters, k=12))
-        if conn is None:
-            return
         try:
+            self.db.add_coin((
+                random_id,str(coin["token_address"]),coin["token_name"],coin["token_img"],coin["blacklist"],coin["twitter_check"],coin["telegram_check"],coin["website_check"],coin["creator_new_wallet"],coin["profit_owner"],coin["oldcoins"],float(coin["owner_percentage"]),int(coin["holder_number"]),float(coin["percentage_top_10"]),float(coin["score"]),coin["top_holders_good_traders"],float(coin["new_wallets_percentage"]),coin["status"]
+            ))
+            info(f"{task_number} - Coin queued for the database.")
+        except Exception as e:
+            error(f"{task_number} - Error queuing coin for the database: {e}")
 
-            insert_query = """
-            INSERT INTO coins (
-                id,token_address,token_name,token_img ,blacklist ,twitter_check ,telegram_check ,website_check ,creator_new_wallet ,profit_owner ,oldcoins ,owner_percentage ,holder_number ,percentage_top_10 ,score ,top_holders_good_traders ,new_wallets_percentage ,success
-            ) VALUES (
-                $1, $2, $3, $4, $5, $6, $7, $8, $9, $10, $11, $12, $13, $14, $15, $16, $17, $18
-            );
-            """
-            
-            await conn.execute(insert_query,
-                random_id,str(coin["token_address"]),coin["token_name"],coin["token_img"],coin["blacklist"],coin["twitter_check"],coin["telegram_check"],coin["website_check"],coin["creator_new_wallet"],coin["profit_owner"],coin["oldcoins"],int(coin["owner_percentage"]),int(coin["holder_number"]),int(coin["percentage_top_10"]),int(coin["score"]),coin["top_holders_good_traders"],coin["new_wallets_percentage"],coin["status"]
-            )
-            info(f"{task_number} - Dati inseriti con successo nel database.")
-        except Exception:
-            error(f"Errore durante l'inserimento dei dati")
-        finally:
-            await conn.close()
+    async def update_coin_outcome(self,task_number,token_address,success):
+        try:
+            # The coin row may still be waiting in the write queue.
+            await self.db.flush()
+            await self.db.execute("UPDATE coins SET success = $1, labeled_at = now() WHERE token_address = $2;", success, str(token_address))
+            info(f"{task_number} - Outcome saved for {token_address}: {success}")
+        except Exception as e:
+            error(f"{task_number} - Error saving outcome: {e}")
+
+    async def restore_pending_labels(self):
+        """Resume outcome tracking for coins stored before a restart that still have no label."""
+        try:
+            rows = await self.db.fetch("SELECT token_address FROM coins WHERE success IS NULL ORDER BY inserted_at;")
+            for row in rows:
+                self.labeler.watch(row["token_address"], random.randint(10000, 99999))
+            if rows:
+                info(f"Resumed outcome tracking for {len(rows)} coins")
+        except Exception as e:
+            error(f"Error restoring pending labels: {e}")
 
     async def monitor_coin(self, task_number,coin):
-        check_scam = False
-        check_range = False
-        url = "https://public-api.birdeye.so/defi/v3/token/market-data?address={}".format(str(coin["token_address"]))
-        headers = {
-            "accept": "application/json",
-            "x-chain": "solana",
-            "X-API-KEY": self.birdeye_apikey
-        }
-        while True:
-            try:
-                info(f"{task_number} - Monitoring coin...")
-                async with httpx.AsyncClient() as client:
-                    response = await client.get(url=url, headers=headers, timeout=15)
-                    if response.status_code == 500:
-                        error(f"{task_number} - Internal server error while monitoring coin. Retrying...")
-                        await asyncio.sleep(20)
-                    if response.status_code == 429:
-                        error(f"{task_number} - Rate limit error while monitoring coin. Retrying...")
-                        await asyncio.sleep(20)
-                    if response.status_code != 200:
-                        error(f"{task_number} - Error monitoring coin: {response.status_code}")
-                        await asyncio.sleep(20)
-                    else:
-                        data = response.json()
-                        if check_scam:
-                            try:
-                                if data["data"]["marketcap"] > 150000:
-                                    info(f"{task_number} - Price change detected: {data['data']['marketcap']}")
-                                    return True
-                                elif data["data"]["marketcap"] < 25000:
-                                    info(f"{task_number} - Price change detected: {data['data']['marketcap']}")
-                                    return False
-                            except KeyError:
-                                if data["data"]["price"] > 0.0005:
-                                    info(f"{task_number} - Price change detected, using price: {data['data']['price']}")
-                                    return True
-                                elif data["data"]["price"] < 0.000025:
-                                    info(f"{task_number} - Price change detected, using price: {data['data']['price']}")
-                                    return False
-                            finally:
-                                if not check_range:
-                                    info(f"{task_number} - Coin is in range to check scam, monitoring...")
-                                    await asyncio.sleep(20)
-                        else:
-                            try:
-                                if data["data"]["marketcap"] > 500000:
-                                    info(f"{task_number} - Price change detected, wainting 10 minutes to check scam")
-                                    check_scam = True
-                                    await asyncio.sleep(600)
-                                elif data["data"]["marketcap"] < 25000:
-                                    info(f"{task_number} - Price change detected: {data['data']['marketcap']}")
-                                    return False
-                            except KeyError:
-                                if data["data"]["price"] > 0.0005:
-                                    info(f"{task_number} - Price change detected, wainting 10 minutes to check scam")
-                                    check_scam = True
-                                    await asyncio.sleep(600)
-                                elif data["data"]["price"] < 0.000025:
-                                    info(f"{task_number} - Price change detected, using price: {data['data']['price']}")
-                                    return False
-                            finally:
-                                if not check_range:
-                                    info(f"{task_number} - Coin is in range, monitoring...")
-                                    await asyncio.sleep(20)
-            except Exception as e:
-                error(f"{task_number} - Error monitoring coin: {e}")
-                warn(data)
-                await asyncio.sleep(20)
+        info(f"{task_number} - Monitoring coin...")
+        return await self.market_watcher.watch(coin["token_address"], task_number)
 
     async def check_blacklist(self,task_number,coin):
         info(f"{task_number} - Checking blacklist...")
@@ -796,149 +802,172 @@ class AI:
             max_depth=6,            
             random_state=42         
         )
-        self.connection = None
         self.is_fitted = False
-        self.label_encoders = {}  
+        self.feature_spec = FeatureSpec()
         self.best_model = None
+        self.model_meta = {}
+        self.predictor = None
+        self.drift = None
+        self.scheduler = None
 
     async def start(self, class_a_instance):
         warn("AI: Starting process...")
         self.class_a_instance = class_a_instance
-        await self.train_model_with_tuning()
-
-    async def connect_to_db(self):
-        """Connect to the PostgreSQL database."""
-        if not self.connection:
-            self.connection = await asyncpg.connect(
-                user='',
-                password='',
-                database='',
-                host='',
-                port=number
-            )
-        return self.connection
+        self.predictor = PredictionService(**class_a_instance.config.get('inference', {}))
+        asyncio.create_task(self.predictor.run())
+        self.drift = DriftMonitor(self.feature_spec, **class_a_instance.config.get('drift', {}))
+        self.loader = TrainingDataLoader(class_a_instance.db, **class_a_instance.config.get('training_data', {}))
+        settings = {"path": "models", "keep": 5, **class_a_instance.config.get('model_store', {})}
+        self.model_store = ModelStore(settings["path"], settings["keep"])
+        settings = {"holdout_share": 0.5, "min_improvement": 0.0, "min_rows": 1000, **class_a_instance.config.get('retraining', {})}
+        self.holdout_share = settings.pop("holdout_share")
+        self.min_improvement = settings.pop("min_improvement")
+        self.min_rows = settings.pop("min_rows")
+        loaded = self.model_store.load_latest(self.feature_spec)
+        if loaded:
+            self.best_model, self.model_meta = loaded
+            self.predictor.load(self.best_model, self.feature_spec)
+            self.drift.load(self.model_meta.get("drift_reference"))
+            labeled_until = self.model_meta.get("labeled_until")
+        else:
+            labeled_until = None
+            try:
+                labeled_until = await self.train_model_with_tuning()
+            except Exception as e:
+                # Fresh installs have too few labeled coins: keep collecting, the scheduler retries.
+                error(f"AI: No model yet, training failed: {e}. Retrying every check interval, coins are stored meanwhile.")
+        self.scheduler = RetrainScheduler(
+            self.train_model_with_tuning, self.count_new_labels,
+            last_run=self.model_meta.get("created_at", 0), labeled_until=labeled_until, **settings
+        )
+        await self.scheduler.run()
+
+    async def count_new_labels(self, labeled_until):
+        if not labeled_until:
+            return await self.class_a_instance.db.fetchval("SELECT count(*) FROM coins WHERE success IS NOT NULL;")
+        return await self.class_a_instance.db.fetchval(
+            "SELECT count(*) FROM coins WHERE success IS NOT NULL AND labeled_at > $1;",
+            pd.Timestamp(labeled_until).to_pydatetime()
+        )
 
     async def fetch_data(self):
         """Fetch data from the database."""
         warn("AI: Fetching data from the database...")
-        conn = await self.connect_to_db()
-        query = "SELECT * FROM coins;"
-        rows = await conn.fetch(query)
-        data = [dict(row) for row in rows] 
-        return pd.DataFrame(data)
+        return await self.loader.load()
 
     async def preprocess_data(self, data):
-        """Prepare infos for training."""
-        categorical_columns = [
-            "blacklist", "twitter_check", "website_check",
-            "creator_new_wallet", "profit_owner", "oldcoins", "top_holders_good_traders", "success"
-        ]
-
-        for col in categorical_columns:
-            if col in data.columns:
-                if col not in self.label_encoders:
-                    self.label_encoders[col] = LabelEncoder()
-                    data[col] = self.label_encoders[col].fit_transform(data[col].astype(str))
-                else:
-                    data[col] = self.label_encoders[col].transform(data[col].astype(str))
-
-        X = data.drop(columns=["id", "token_address", "token_name", "token_img", "success"])
-        y = data["success"]
+        """Prepare infos for training: the encoded features and the 0/1 success label."""
+        X = self.feature_spec.encode_frame(data)
+        y = data["success"].astype(int)
 
         return X, y
 
-    async def train_model_with_tuning(self):
+    async def train_model_with_tuning(self, reason="no saved model"):
+        """Train a candidate, swap it in if it beats the live model on coins labeled since, and return the newest label time read."""
         warn("AI: Training and tuning the model...")
-
-        data = await self.fetch_data()
+        started = time.time()
+        data = (await self.fetch_data()).sort_values("inserted_at", kind="stable")
+        if len(data) < self.min_rows:
+            raise RuntimeError(f"only {len(data)} labeled coins, at least {self.min_rows} are needed to train")
+        labeled_until = data["labeled_at"].max().isoformat() if len(data) else None
+        live_model, live_version = self.best_model, self.model_meta.get("version")
+        loop = asyncio.get_running_loop()
+        X_holdout = y_holdout = live_auc = None
+        if live_model is not None:
+            # Coins labeled since the live model was trained: the older ones train the candidate, the newest test both.
+            data, holdout = comparison_split(data, self.model_meta.get("labeled_until"), self.holdout_share)
+            X_holdout, y_holdout = await self.preprocess_data(holdout)
+            live_auc = await loop.run_in_executor(None, holdout_auc, live_model, X_holdout, y_holdout)
         X, y = await self.preprocess_data(data)
-        print(X)
-        print(y)
-        scale_pos_weight = len(y[y == 0]) / len(y[y == 1])
-
-        model = XGBClassifier(
-            objective="binary:logistic",
-            eval_metric="auc",
-            scale_pos_weight=scale_pos_weight,
-            n_jobs=-1
-        )
-
-        param_grid = {
-            "max_depth": [3, 5, 7],
-            "learning_rate": [0.01, 0.1, 0.2],
-            "n_estimators": [50, 100, 200],
-            "subsample": [0.8, 1.0],
-            "colsample_bytree": [0.8, 1.0],
-        }
-
-        kfold = StratifiedKFold(n_splits=5, shuffle=True, random_state=42)
-
-        grid_search = GridSearchCV(
-            estimator=model,
-            param_grid=param_grid,
-            scoring=make_scorer(roc_auc_score, needs_proba=True),
-            cv=kfold,
-            verbose=2,
-            n_jobs=-1
+        settings = self.class_a_instance.config.get('training', {})
+        # Fitting is CPU bound: run it in a worker process so detection keeps running meanwhile.
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            model, report = await loop.run_in_executor(
+                executor,
+                partial(train_candidate, X, y, data["inserted_at"], X_holdout, y_holdout, live_auc, self.min_improvement, **settings)
+            )
+        info(
+            f"AI: {report['fits']} fits in {report['seconds']:.1f}s ({report['fits_per_second']:.2f} fits/s, "
+            f"{report['threads']} threads), validation AUC {report['validation_auc']:.4f}"
         )
+        for rung in report["rungs"]:
+            info(f"AI: {rung['fits']} candidates at {rung['rounds']} rounds, best AUC {rung['best_auc']}")
+        for window in report["walk_forward"]:
+            auc = "n/a (one class)" if window["auc"] is None else f"{window['auc']:.4f}"
+            info(
+                f"AI: Walk-forward {window['from'][:16]} to {window['to'][:16]}: AUC {auc} on {window['rows']} coins "
+                f"({window['positive_rate']:.1%} successful), trained on {window['train_rows']} older coins"
+            )
 
-        grid_search.fit(X, y)
-
-        self.best_model = grid_search.best_estimator_
-        warn(f"Best Parameters: {grid_search.best_params_}")
+        accepted = report["accepted"]
+        if live_model is not None:
+            info(
+                f"AI: AUC on the newest {report['holdout_rows']} coins labeled since {live_version}: candidate {report['holdout_auc']}, "
+                f"live model {live_auc}, {'swapping models' if accepted else 'keeping the live model'}"
+            )
 
-        y_pred = self.best_model.predict(X)
-        y_proba = self.best_model.predict_proba(X)[:, 1]
-        info("AI: \nClassification Report:")
-        info(classification_report(y, y_pred))
-        info(f"AI: AUC-ROC Score: {roc_auc_score(y, y_proba):.4f}")
+        version = None
+        if accepted:
+            # No await between the two: predictions see either the old model or the new one.
+            self.best_model = model
+            self.predictor.load(model, self.feature_spec)
+            warn(f"Best Parameters: {report['best_params']} ({report['best_rounds']} rounds)")
+            self.drift.fit(X if X_holdout is None else pd.concat([X, X_holdout]))
+            self.model_meta = self.model_store.save(
+                model, self.feature_spec, report, labeled_until=labeled_until, drift_reference=self.drift.to_dict()
+            )
+            version = self.model_meta["version"]
+
+        self.model_store.record({
+            "started_at": started,
+            "seconds": time.time() - started,
+            "reason": reason,
+            "rows": len(X),
+            "holdout_rows": report["holdout_rows"],
+            "refit_rows": report["refit_rows"],
+            "validation_auc": report["validation_auc"],
+            "walk_forward_auc": [window["auc"] for window in report["walk_forward"]],
+            "holdout_auc": report["holdout_auc"],
+            "live_version": live_version,
+            "live_holdout_auc": live_auc,
+            "accepted": accepted,
+            "version": version,
+        })
+        return labeled_until
 
     async def receive_data_from_a(self, data):
         info("AI: Received data from Bot A.")
+        if self.best_model is None:
+            info("AI: No model trained yet, coin stored without a prediction.")
+            return
         data = data
         prediction = await self.predict_new_coin(data)
         info(f"AI: Success probability for new coin: {prediction}")
+        self.check_drift(data)
         data = {"prediction": prediction}
         info("AI: Sending data to Bot A.")
 
+    def check_drift(self, data):
+        """Count the coin in the drift histograms and retrain when its features drifted from the training data."""
+        self.drift.observe(data)
+        drifted = self.drift.check()
+        if not drifted:
+            return
+        summary = ", ".join(f"{name} {value:.2f}" for name, value in sorted(drifted.items(), key=lambda item: -item[1]))
+        warn(f"AI: Feature drift over the last {self.drift.count} coins (PSI {summary})")
+        # If the new model is rejected the drift stays, so wait longer before asking again.
+        quiet = self.drift.back_off()
+        if self.scheduler and self.scheduler.trigger(f"feature drift in {', '.join(drifted)}"):
+            info(f"AI: Retraining for drift, drift checks paused for {quiet / 60:.0f} min")
+        else:
+            warn(f"AI: Drift retraining skipped, a training run is already in progress. Drift checks paused for {quiet / 60:.0f} min")
+
     async def predict_new_coin(self, data):
         """Predict the success probability of a new coin."""
         try:
-            new_data = {
-                "blacklist":data["blacklist"],
-                "twitter_check":data["twitter_check"],
-                "telegram_check":data["telegram_check"],
-                "website_check":data["website_check"],
-                "creator_new_wallet":data["creator_new_wallet"],
-                "profit_owner":data["profit_owner"],
-                "oldcoins":data["oldcoins"],
-                "owner_percentage":data["owner_percentage"],
-                "holder_number":data["holder_number"],
-                "percentage_top_10":data["percentage_top_10"],
-                "score":data["score"],
-                "top_holders_good_traders":data["top_holders_good_traders"],
-                "new_wallets_percentage":data["new_wallets_percentage"],
-            }
-            if not self.best_model:
-                raise ValueError("The model is not trained yet.")
-
-            new_coin_df = pd.DataFrame([new_data])
-            categorical_columns = [
-                "blacklist", "twitter_check", "website_check",
-                "creator_new_wallet", "profit_owner", "oldcoins", "top_holders_good_traders"
-            ]
-
-            for col in categorical_columns:
-                if col in new_coin_df.columns:
-                    if col not in self.label_encoders:
-                        self.label_encoders[col] = LabelEncoder()
-                        new_coin_df[col] = self.label_encoders[col].fit_transform(new_coin_df[col].astype(str))
-                    else:
-                        new_coin_df[col] = self.label_encoders[col].transform(new_coin_df[col].astype(str))
-
-            success_probability = self.best_model.predict_proba(new_coin_df)[:, 1][0]
-            print(success_probability)
-            info(f"Prediction completed: {success_probability * 100:.2f}%")
+            success_probability = await self.predictor.predict(data)
+            p50, p99 = self.predictor.latency()
+            info(f"Prediction completed: {success_probability * 100:.2f}% (latency p50 {p50:.2f} ms, p99 {p99:.2f} ms)")
             if success_probability > 0.5:
                 await self.send_to_discord(data, success_probability)
             else: 
@@ -956,29 +985,28 @@ class AI:
         You will need to add some more stuff its very basic now
         """
         try:
-            async with httpx.AsyncClient() as client:
-                message = {
-                    "content": None,
-                    "embeds": [
-                        {
-                            "title": "AI Prediction Result",
-                            "description": "Details about the new coin.",
-                            "fields": [
-                                {"name": "Token Name", "value": str(data["token_name"]), "inline": True},
-                                {"name": "Contract Address", "value": str(data["token_address"]), "inline": True},
-                                {"name": "Success Probability", "value": f"{success_probability * 100:.2f}%", "inline": True},
-                                {"name": "Dex Screener", "value": f"https://dexscreener.com/solana/{str(data['token_address'])}", "inline": True}
-                            ],
-                            "color": 3066993,  # Green color
-                            "image": {"url": str(data["token_img"])}
-                        }
-                    ]
-                }
-                response = await client.post("https://discord.com/api/webhooks/1332508364961484800/KmvWf7GKZD0giNO8R2q3wQaAKJ8F0TDrzKGa57pxzcuFtgK0mR26vLdaGCuUQO-Bnt-j", json=message)
-                if response.status_code == 204:
-                    info("Prediction result sent to Discord successfully.")
-                else:
-                    error(f"Failed to send prediction result to Discord. Status Code: {response.status_code}")
+            message = {
+                "content": None,
+                "embeds": [
+                    {
+                        "title": "AI Prediction Result",
+                        "description": "Details about the new coin.",
+                        "fields": [
+                            {"name": "Token Name", "value": str(data["token_name"]), "inline": True},
+                            {"name": "Contract Address", "value": str(data["token_address"]), "inline": True},
+                            {"name": "Success Probability", "value": f"{success_probability * 100:.2f}%", "inline": True},
+                            {"name": "Dex Screener", "value": f"https://dexscreener.com/solana/{str(data['token_address'])}", "inline": True}
+                        ],
+                        "color": 3066993,  # Green color
+                        "image": {"url": str(data["token_img"])}
+                    }
+                ]
+            }
+            response = await self.class_a_instance.http.post("https://discord.com/api/webhooks/1332508364961484800/KmvWf7GKZD0giNO8R2q3wQaAKJ8F0TDrzKGa57pxzcuFtgK0mR26vLdaGCuUQO-Bnt-j", json=message)
+            if response.status_code == 204:
+                info("Prediction result sent to Discord successfully.")
+            else:
+                error(f"Failed to send prediction result to Discord. Status Code: {response.status_code}")
         except Exception as e:
             error(f"Error sending data to Discord: {e}")
 
@@ -986,9 +1014,13 @@ class AI:
 async def main():
     class_a = BotMain()
     class_b = AI()
-    await asyncio.gather(
-        class_b.start(class_a),
-        class_a.run(class_b)
-    )
+    try:
+        await asyncio.gather(
+            class_b.start(class_a),
+            class_a.run(class_b)
+        )
+    finally:
+        await class_a.close()
 
-asyncio.run(main())
\ No newline at end of file
+if __name__ == "__main__":
+    asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,125 @@
+import time
+import heapq
+import asyncio
+import itertools
+from logger import error, info
+
+WATCHING = "watching"
+SCAM_WINDOW = "scam_window"
+
+# (marketcap, price) thresholds, price is only used when Birdeye has no marketcap for the token.
+PUMP_THRESHOLD = (500000, 0.0005)
+SUCCESS_THRESHOLD = (150000, 0.0005)
+FAILURE_THRESHOLD = (25000, 0.000025)
+
+
+def above(data, threshold):
+    if data.get("marketcap") is not None:
+        return data["marketcap"] > threshold[0]
+    return data.get("price") is not None and data["price"] > threshold[1]
+
+
+def below(data, threshold):
+    if data.get("marketcap") is not None:
+        return data["marketcap"] < threshold[0]
+    return data.get("price") is not None and data["price"] < threshold[1]
+
+
+class MarketWatcher:
+    """
+    Resolves the outcome of every watched coin from one polling loop.
+
+    Tokens sit in a priority queue ordered by when they are due. Due tokens are checked together
+    with Birdeye's multi-address market data endpoint, `batch_size` tokens per request. Each
+    token then moves through the outcome state machine:
+        watching    --marketcap > 500k-->  scam_window (first re-check after `scam_window` seconds)
+        watching    --marketcap < 25k--->  failure
+        scam_window --marketcap > 150k-->  success
+        scam_window --marketcap < 25k--->  failure
+    """
+
+    def __init__(self, http, api_key, interval=20, scam_window=600, batch_size=20):
+        self.http = http
+        self.api_key = api_key
+        self.interval = interval
+        self.scam_window = scam_window
+        self.batch_size = batch_size
+        self.queue = []
+        self.tokens = {}
+        self._order = itertools.count()
+        self._wakeup = asyncio.Event()
+
+    def watch(self, token_address, task_number):
+        """Future resolved with True (success) or False (failure) once the coin's outcome is known."""
+        token_address = str(token_address)
+        if token_address not in self.tokens:
+            self.tokens[token_address] = {
+                "task_number": task_number,
+                "phase": WATCHING,
+                "future": asyncio.get_running_loop().create_future()
+            }
+            self._schedule(token_address, 0)
+            self._wakeup.set()
+        return self.tokens[token_address]["future"]
+
+    def _schedule(self, token_address, delay):
+        heapq.heappush(self.queue, (time.monotonic() + delay, next(self._order), token_address))
+
+    def _finish(self, token_address, success, data):
+        state = self.tokens.pop(token_address)
+        info(f"{state['task_number']} - Price change detected: {data.get('marketcap') or data.get('price')}")
+        if not state["future"].done():
+            state["future"].set_result(success)
+
+    def _advance(self, token_address, data):
+        state = self.tokens[token_address]
+        if data:
+            if state["phase"] == SCAM_WINDOW:
+                if above(data, SUCCESS_THRESHOLD):
+                    return self._finish(token_address, True, data)
+                if below(data, FAILURE_THRESHOLD):
+                    return self._finish(token_address, False, data)
+            else:
+                if above(data, PUMP_THRESHOLD):
+                    info(f"{state['task_number']} - Price change detected, waiting {self.scam_window / 60:g} minutes to check scam")
+                    state["phase"] = SCAM_WINDOW
+                    return self._schedule(token_address, self.scam_window)
+                if below(data, FAILURE_THRESHOLD):
+                    return self._finish(token_address, False, data)
+        self._schedule(token_address, self.interval)
+
+    async def _check(self, tokens):
+        try:
+            response = await self.http.get(
+                "https://public-api.birdeye.so/defi/v3/token/market-data/multiple",
+                params={"list_address": ",".join(tokens)},
+                headers={"accept": "application/json", "x-chain": "solana", "X-API-KEY": self.api_key},
+                timeout=15
+            )
+            if response.status_code != 200:
+                raise RuntimeError(f"status {response.status_code}")
+            market = response.json().get("data") or {}
+        except Exception as e:
+            error(f"Error checking market data for {len(tokens)} coins: {e}")
+            market = {}
+        for token_address in tokens:
+            self._advance(token_address, market.get(token_address))
+
+    async def run(self):
+        while True:
+            now = time.monotonic()
+            due = []
+            while self.queue and self.queue[0][0] <= now:
+                token_address = heapq.heappop(self.queue)[2]
+                if token_address in self.tokens:
+                    due.append(token_address)
+            if not due:
+                self._wakeup.clear()
+                timeout = self.queue[0][0] - now if self.queue else None
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            info(f"Checking market data for {len(due)} of {len(self.tokens)} watched coins")
+            await asyncio.gather(*(self._check(due[i:i + self.batch_size]) for i in range(0, len(due), self.batch_size)))
@@ -0,0 +1,87 @@
+import os
+import json
+import time
+import shutil
+from xgboost import XGBClassifier
+from features import FeatureSpec
+from logger import info, warn
+
+ARTIFACT_FORMAT = 2
+
+
+class ModelStore:
+    """
+    Versioned model artifacts on disk, one directory per trained model:
+
+        models/v0003/model.ubj   XGBoost native binary (UBJSON) booster
+        models/v0003/meta.json   version, feature spec, training report, drift reference histograms
+        models/registry.jsonl    one line per training run, accepted or not, with its metrics
+
+    A version is written to a temporary directory and renamed into place, so a crash never leaves
+    a half-written artifact behind. Only the newest `keep` versions are kept.
+    """
+
+    def __init__(self, path="models", keep=5):
+        self.path = path
+        self.keep = keep
+
+    def versions(self):
+        if not os.path.isdir(self.path):
+            return []
+        return sorted(name for name in os.listdir(self.path) if name.startswith("v") and name[1:].isdigit())
+
+    def save(self, model, spec, report=None, labeled_until=None, drift_reference=None):
+        os.makedirs(self.path, exist_ok=True)
+        versions = self.versions()
+        version = f"v{int(versions[-1][1:]) + 1 if versions else 1:04d}"
+        temporary = os.path.join(self.path, f".{version}.tmp")
+        shutil.rmtree(temporary, ignore_errors=True)
+        os.makedirs(temporary)
+        model.save_model(os.path.join(temporary, "model.ubj"))
+        meta = {
+            "format": ARTIFACT_FORMAT,
+            "version": version,
+            "created_at": time.time(),
+            "feature_spec": spec.to_dict(),
+            "labeled_until": labeled_until,
+            "report": report or {},
+            "drift_reference": drift_reference,
+        }
+        with open(os.path.join(temporary, "meta.json"), "w") as file:
+            json.dump(meta, file, indent=4, default=str)
+        os.replace(temporary, os.path.join(self.path, version))
+        for old in self.versions()[:-self.keep]:
+            shutil.rmtree(os.path.join(self.path, old), ignore_errors=True)
+        info(f"AI: Saved model {version} to {self.path}")
+        return meta
+
+    def record(self, entry):
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, "registry.jsonl"), "a") as file:
+            file.write(json.dumps(entry, default=str) + "\n")
+
+    def history(self):
+        path = os.path.join(self.path, "registry.jsonl")
+        if not os.path.exists(path):
+            return []
+        with open(path) as file:
+            return [json.loads(line) for line in file if line.strip()]
+
+    def load_latest(self, spec):
+        """(model, meta) of the newest artifact trained with the feature spec `spec`, or None."""
+        for version in reversed(self.versions()):
+            directory = os.path.join(self.path, version)
+            try:
+                started = time.perf_counter()
+                with open(os.path.join(directory, "meta.json")) as file:
+                    meta = json.load(file)
+                if meta.get("format") != ARTIFACT_FORMAT or FeatureSpec.from_dict(meta["feature_spec"]) != spec:
+                    warn(f"AI: Skipping model {version}, it was trained on a different feature schema")
+                    continue
+                model = XGBClassifier()
+                model.load_model(os.path.join(directory, "model.ubj"))
+                info(f"AI: Loaded model {version} in {(time.perf_counter() - started) * 1000:.0f} ms")
+                return model, meta
+            except Exception as e:
+                warn(f"AI: Could not load model {version}: {e}")
+        return None
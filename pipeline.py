@@ -0,0 +1,52 @@
+import time
+import asyncio
+from logger import error, info, warn
+
+
+class Stage:
+    """A step of the per-coin pipeline. `func` is awaited once every stage in `requires` succeeded."""
+
+    def __init__(self, name, func, requires=()):
+        self.name = name
+        self.func = func
+        self.requires = tuple(requires)
+
+
+async def run_stages(task_number, stages):
+    """
+    Run `stages` as a dependency graph: every stage starts as soon as the stages it requires are done,
+    so independent lookups overlap. A stage that returns a falsy value or raises is treated as failed
+    and everything depending on it is skipped. Returns ({name: succeeded}, {name: seconds}).
+    """
+    names = {stage.name for stage in stages}
+    for stage in stages:
+        missing = [name for name in stage.requires if name not in names]
+        if missing:
+            raise ValueError(f"Stage {stage.name} requires unknown stages: {missing}")
+
+    tasks = {}
+    timings = {}
+
+    async def run(stage):
+        for name in stage.requires:
+            if not await tasks[name]:
+                warn(f"{task_number} - Skipping {stage.name}, {name} did not complete")
+                return False
+        started = time.perf_counter()
+        try:
+            return bool(await stage.func())
+        except Exception as e:
+            error(f"{task_number} - Stage {stage.name} failed: {e}")
+            return False
+        finally:
+            timings[stage.name] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for stage in stages:
+        tasks[stage.name] = asyncio.ensure_future(run(stage))
+    results = await asyncio.gather(*tasks.values())
+    total = time.perf_counter() - started
+
+    summary = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+    info(f"{task_number} - Pipeline finished in {total:.2f}s ({summary})")
+    return dict(zip(tasks, results)), timings
@@ -0,0 +1,154 @@
+import math
+import numpy as np
+import pandas as pd
+
+COLUMNS = ["bought", "cost", "sold", "revenue"]
+MAX_ROWS = 200000
+
+
+def swap_legs(wallet, transactions):
+    """
+    Columns (mints, is_buy, token_amount, sol_amount) for every token leg of `wallet` in the SWAP transactions.
+
+    Each transaction is walked once: the SOL the wallet sent and received is summed in a single
+    pass over its native transfers and shared by all of its legs, instead of re-scanning the
+    native transfers for every token transfer. Unit conversion happens on the arrays.
+    """
+    mints, buys, amounts, decimals, lamports = [], [], [], [], []
+    for tx in transactions:
+        if "SWAP" not in tx["type"]:
+            continue
+        spent = received = 0
+        for t in tx.get("nativeTransfers", ()):
+            if t["fromUserAccount"] == wallet:
+                spent += t["amount"]
+            if t["toUserAccount"] == wallet:
+                received += t["amount"]
+        for transfer in tx.get("tokenTransfers", ()):
+            if transfer["toUserAccount"] == wallet:
+                buys.append(True)
+                lamports.append(spent)
+            elif transfer["fromUserAccount"] == wallet:
+                buys.append(False)
+                lamports.append(received)
+            else:
+                continue
+            mints.append(transfer["mint"])
+            amounts.append(transfer["tokenAmount"])
+            decimals.append(transfer.get("mintDecimals", 6))
+    tokens = np.array(amounts, dtype=np.float64) / np.power(10.0, np.array(decimals, dtype=np.float64))
+    return mints, np.array(buys, dtype=bool), tokens, np.array(lamports, dtype=np.float64) / 1e9
+
+
+def _chunks(histories, max_rows):
+    """Columnar frames of at most `max_rows` swap legs from {wallet: transactions}."""
+    parts, rows = [], 0
+    for wallet, transactions in histories.items():
+        mints, is_buy, tokens, sols = swap_legs(wallet, transactions)
+        start = 0
+        while start < len(mints):
+            stop = start + min(len(mints) - start, max_rows - rows)
+            parts.append((wallet, mints[start:stop], is_buy[start:stop], tokens[start:stop], sols[start:stop]))
+            rows += stop - start
+            start = stop
+            if rows >= max_rows:
+                yield _frame(parts)
+                parts, rows = [], 0
+    if parts:
+        yield _frame(parts)
+
+
+def _frame(parts):
+    """One frame from (wallet, mints, is_buy, tokens, sols) parts, a wallet appears at most once per frame."""
+    counts = [len(part[1]) for part in parts]
+    buy = np.concatenate([part[2] for part in parts])
+    token = np.concatenate([part[3] for part in parts])
+    sol = np.concatenate([part[4] for part in parts])
+    return pd.DataFrame({
+        "wallet": pd.Categorical.from_codes(np.repeat(np.arange(len(parts)), counts), categories=[part[0] for part in parts]),
+        "mint": pd.Categorical([mint for part in parts for mint in part[1]]),
+        "bought": np.where(buy, token, 0.0),
+        "cost": np.where(buy, sol, 0.0),
+        "sold": np.where(buy, 0.0, token),
+        "revenue": np.where(buy, 0.0, sol),
+    })
+
+
+def _group(frame):
+    return frame.groupby(["wallet", "mint"], sort=False, observed=True)[COLUMNS].sum()
+
+
+def _empty():
+    index = pd.MultiIndex.from_arrays([[], []], names=["wallet", "mint"])
+    return pd.DataFrame(columns=COLUMNS, index=index, dtype=np.float64)
+
+
+def trade_totals(histories, max_rows=MAX_ROWS):
+    """
+    Bought, cost, sold and revenue per (wallet, mint) for {wallet: transactions}.
+
+    Legs are flattened into columnar chunks of at most `max_rows` rows, each chunk is reduced with a
+    grouped sum and only the per-mint partials are kept, so memory stays bounded by the chunk size
+    however many wallets are scored in one call.
+    """
+    return combine_totals(*(_group(frame) for frame in _chunks(histories, max_rows)))
+
+
+def combine_totals(*frames):
+    """Sum trade_totals frames, e.g. the totals so far and a newly fetched page."""
+    frames = [frame for frame in frames if len(frame)]
+    if not frames:
+        return _empty()
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames).groupby(level=["wallet", "mint"], sort=False).sum()
+
+
+def merge_totals(totals, token_trades):
+    """Add cached {wallet: {mint: [bought, cost, sold, revenue]}} totals to a trade_totals frame."""
+    rows = [(wallet, mint, *values) for wallet, trades in token_trades.items() for mint, values in trades.items()]
+    if not rows:
+        return totals
+    cached = pd.DataFrame(rows, columns=["wallet", "mint"] + COLUMNS).set_index(["wallet", "mint"])
+    return combine_totals(totals, cached)
+
+
+def profitable_share(totals):
+    """Percentage of each wallet's mints closed with more SOL received than spent."""
+    if not len(totals):
+        return pd.Series(dtype=np.float64)
+    profitable = (totals["revenue"] - totals["cost"]) > 0
+    return profitable.groupby(level="wallet", sort=False).mean() * 100
+
+
+def to_token_trades(totals):
+    """{wallet: {mint: [bought, cost, sold, revenue]}}, the form kept in the wallet cache."""
+    token_trades = {}
+    for (wallet, mint), values in zip(totals.index, totals[COLUMNS].to_numpy().tolist()):
+        token_trades.setdefault(wallet, {})[mint] = values
+    return token_trades
+
+
+def profit_counts(totals, wallet):
+    """(profitable mints, traded mints) of `wallet`."""
+    if not len(totals) or wallet not in totals.index.get_level_values("wallet"):
+        return 0, 0
+    rows = totals.xs(wallet, level="wallet")
+    return int(((rows["revenue"] - rows["cost"]) > 0).sum()), len(rows)
+
+
+def wilson_interval(successes, total, z=1.96):
+    """Wilson score interval for a binomial proportion, (0, 1) when nothing was observed."""
+    if total == 0:
+        return 0.0, 1.0
+    share = successes / total
+    denominator = 1 + z * z / total
+    centre = (share + z * z / (2 * total)) / denominator
+    margin = z * math.sqrt(share * (1 - share) / total + z * z / (4 * total * total)) / denominator
+    return centre - margin, centre + margin
+
+
+def verdict_settled(successes, total, threshold, z=1.96):
+    """True once the whole Wilson interval of the profitable share lies on one side of `threshold`."""
+    low, high = wilson_interval(successes, total, z)
+    return low > threshold or high < threshold
@@ -0,0 +1,98 @@
+import time
+import asyncio
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from logger import warn
+
+DEFAULT_LIMITS = {
+    "helius_rpc": {"rate": 10, "burst": 10},
+    "helius_api": {"rate": 2, "burst": 2},
+    "birdeye": {"rate": 15, "burst": 15},
+    "pumpfun": {"rate": 5, "burst": 5},
+    "rpc": {"rate": 10, "burst": 10},
+}
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a Retry-After header (delta seconds or HTTP date), None if missing."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(value) - datetime.now(timezone.utc)).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """
+    Token bucket shared by every task calling one upstream.
+
+    The refill rate is tuned with AIMD: it creeps up by `increase` requests/sec per second of
+    successful traffic and is multiplied by `decrease` on every 429, never leaving
+    [`min_rate`, `max_rate`]. A Retry-After pause blocks all callers until it expires.
+    """
+
+    def __init__(self, name, rate, burst=None, min_rate=None, max_rate=None, increase=0.1, decrease=0.5):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.min_rate = float(min_rate or max(self.rate / 10, 0.1))
+        self.max_rate = float(max_rate or rate)
+        self.increase = increase
+        self.decrease = decrease
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.throttled = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, cost=1):
+        # The lock keeps waiters in FIFO order so a busy coin cannot starve the others.
+        # A cost above the burst (a large JSON-RPC batch) leaves the bucket in debt instead of blocking forever.
+        needed = min(cost, self.burst)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self.blocked_until:
+                    await asyncio.sleep(self.blocked_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= needed:
+                    self.tokens -= cost
+                    return
+                await asyncio.sleep((needed - self.tokens) / self.rate)
+
+    def on_success(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        self._refill(time.monotonic())
+        self.throttled += 1
+        self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.tokens = 0.0
+        if retry_after:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+        warn(f"Rate limited by {self.name}, slowing down to {self.rate:.2f} req/s" + (f" and pausing {retry_after:.1f}s" if retry_after else ""))
+
+
+class RateLimiter:
+    """Token buckets keyed by upstream name, configured from the `rate_limits` config section."""
+
+    def __init__(self, config=None):
+        self.config = config or {}
+        self.buckets = {}
+
+    def bucket(self, upstream):
+        if upstream not in self.buckets:
+            settings = {**DEFAULT_LIMITS.get(upstream, {"rate": 10}), **self.config.get(upstream, {})}
+            self.buckets[upstream] = TokenBucket(upstream, **settings)
+        return self.buckets[upstream]
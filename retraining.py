@@ -0,0 +1,131 @@
+import time
+import asyncio
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score
+from logger import error, info
+from evaluation import walk_forward
+from tuning import build_model, successive_halving
+
+
+def unseen_split(data, labeled_until):
+    """(rows labeled up to `labeled_until`, rows labeled after it), the second part never seen by a model trained then."""
+    if not labeled_until:
+        return data, data.iloc[:0]
+    unseen = data["labeled_at"] > pd.Timestamp(labeled_until)
+    return data[~unseen], data[unseen]
+
+
+def comparison_split(data, labeled_until, holdout_share=0.5):
+    """
+    (candidate training rows, holdout rows) for comparing a candidate with the live model trained up to `labeled_until`.
+
+    The coins labeled since then are split by insertion time. The older part trains the candidate together
+    with everything the live model saw, so the candidate always has data the live model lacks. The newest
+    `holdout_share` of them is held out from both models.
+    """
+    seen, unseen = unseen_split(data, labeled_until)
+    unseen = unseen.sort_values("inserted_at", kind="stable")
+    split = len(unseen) - int(len(unseen) * holdout_share)
+    return pd.concat([seen, unseen.iloc[:split]]).sort_values("inserted_at", kind="stable"), unseen.iloc[split:]
+
+
+def holdout_auc(model, X, y):
+    """AUC of `model` on the held out rows, None when there are none or they have a single class."""
+    if X is None or len(np.unique(y)) < 2:
+        return None
+    return float(roc_auc_score(y, model.predict_proba(X)[:, 1]))
+
+
+def train_candidate(X, y, inserted_at, X_holdout=None, y_holdout=None, live_auc=None, min_improvement=0.0,
+                    walk_forward_windows=4, walk_forward_budget_seconds=60, **settings):
+    """
+    Worker process entry: tune a model on the time-ordered (X, y) and evaluate it walk-forward.
+
+    Without a holdout (no live model) the candidate is accepted. Otherwise it is accepted only when
+    its AUC on the holdout beats `live_auc` by more than `min_improvement`, and is then refit on the
+    training and holdout rows together with the winning parameters and rounds.
+    """
+    model, report = successive_halving(X, y, **settings)
+    report["walk_forward"] = walk_forward(
+        X, y, inserted_at, walk_forward_windows, **{**settings, "budget_seconds": walk_forward_budget_seconds}
+    )
+    report["holdout_auc"] = holdout_auc(model, X_holdout, y_holdout)
+    report["holdout_rows"] = 0 if X_holdout is None else len(X_holdout)
+    report["live_holdout_auc"] = live_auc
+    if X_holdout is None:
+        report["accepted"] = True
+    else:
+        report["accepted"] = (
+            report["holdout_auc"] is not None and live_auc is not None and report["holdout_auc"] > live_auc + min_improvement
+        )
+    if report["accepted"] and report["holdout_rows"]:
+        X_all, y_all = pd.concat([X, X_holdout]), pd.concat([y, y_holdout])
+        model = build_model(report["best_rounds"], y_all, report["threads"], settings.get("random_state", 42), **report["best_params"])
+        model.fit(X_all, y_all, verbose=False)
+    report["refit_rows"] = len(X) + report["holdout_rows"] if report["accepted"] else 0
+    return model, report
+
+
+class RetrainScheduler:
+    """
+    Decides when the AI trains a new model.
+
+    Every `check_interval` seconds it retrains when the last run is `retrain_interval` seconds old
+    or `retrain_rows` coins were labeled since the data it used. `trigger(reason)` starts a run
+    right away. Training itself is `train(reason)`, which returns the newest `labeled_at` it read,
+    so a rejected candidate does not make the next check retrain on the same rows again.
+    """
+
+    def __init__(self, train, count_new_labels, retrain_interval=86400, retrain_rows=500, check_interval=300,
+                 last_run=0, labeled_until=None):
+        self.train = train
+        self.count_new_labels = count_new_labels
+        self.retrain_interval = retrain_interval
+        self.retrain_rows = retrain_rows
+        self.check_interval = check_interval
+        self.last_run = last_run
+        self.labeled_until = labeled_until
+        self.wake = asyncio.Event()
+        self.reason = None
+        self.running = False
+
+    def trigger(self, reason):
+        """Start a run now, False when one is already running."""
+        if self.running:
+            return False
+        self.reason = reason
+        self.wake.set()
+        return True
+
+    async def due(self):
+        age = time.time() - self.last_run
+        if age >= self.retrain_interval:
+            return f"last model is {age / 3600:.1f}h old"
+        new_rows = await self.count_new_labels(self.labeled_until)
+        if new_rows >= self.retrain_rows:
+            return f"{new_rows} coins labeled since the last training"
+        return None
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self.wake.wait(), self.check_interval)
+            except asyncio.TimeoutError:
+                pass
+            self.wake.clear()
+            try:
+                reason = self.reason or await self.due()
+                self.reason = None
+                if not reason:
+                    continue
+                info(f"AI: Retraining, {reason}")
+                self.running = True
+                started = time.time()
+                self.labeled_until = await self.train(reason)
+                self.last_run = started
+            except Exception as e:
+                error(f"AI: Error retraining the model: {e}")
+            finally:
+                self.running = False
+
@@ -0,0 +1,44 @@
+import asyncio
+from logger import warn
+
+
+async def rpc_batch(http, url, calls, max_attempts=5):
+    """
+    Send `calls` ([(method, params), ...]) as one JSON-RPC batch array.
+
+    Returns the results in the same order as `calls`. Elements that come back with an error
+    are retried on their own in a smaller batch; an element that still fails after
+    `max_attempts` is returned as None.
+    """
+    results = [None] * len(calls)
+    pending = list(range(len(calls)))
+    attempt = 0
+    while pending and attempt < max_attempts:
+        attempt += 1
+        payload = [{"jsonrpc": "2.0", "id": index, "method": calls[index][0], "params": calls[index][1]} for index in pending]
+        failed = []
+        try:
+            response = await http.post(url, json=payload, headers={"Content-Type": "application/json"}, cost=len(payload), timeout=30)
+            data = response.json()
+            if response.status_code != 200 or not isinstance(data, list):
+                # The whole batch was rejected (e.g. rate limited), retry every element.
+                warn(f"RPC batch of {len(payload)} failed with status {response.status_code}: {data}")
+                failed = pending
+            else:
+                by_id = {item.get("id"): item for item in data}
+                for index in pending:
+                    item = by_id.get(index)
+                    if item is not None and "result" in item:
+                        results[index] = item["result"]
+                    else:
+                        failed.append(index)
+                if failed:
+                    first_error = by_id.get(failed[0], {}).get("error")
+                    warn(f"{len(failed)}/{len(payload)} RPC batch elements failed ({first_error}), retrying them")
+        except Exception as e:
+            warn(f"RPC batch of {len(payload)} failed: {e}")
+            failed = pending
+        pending = failed
+        if pending and attempt < max_attempts:
+            await asyncio.sleep(min(2 ** attempt, 30))
+    return results
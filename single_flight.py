@@ -0,0 +1,59 @@
+import asyncio
+from logger import info
+
+
+class SingleFlight:
+    """
+    Coalesces identical concurrent lookups into one upstream call.
+
+    The first caller for a key does the work; callers arriving while it is in flight await the
+    same future. `saved` counts the upstream calls that were avoided this way.
+    """
+
+    def __init__(self):
+        self._inflight = {}
+        self.calls = 0
+        self.saved = 0
+
+    async def do(self, key, func, *args, **kwargs):
+        future = self._inflight.get(key)
+        if future is not None:
+            self.saved += 1
+            return await asyncio.shield(future)
+        task = asyncio.ensure_future(func(*args, **kwargs))
+        self._register(key, task)
+        # Shielded so one cancelled caller does not cancel the lookup for everybody else.
+        return await asyncio.shield(task)
+
+    def claim(self, keys):
+        """
+        Batch form of `do`: returns (owned, waiting).
+
+        `owned` are the keys nobody is fetching yet; the caller must fetch them and call `settle`
+        for each one. `waiting` maps keys already in flight to the futures to await.
+        """
+        loop = asyncio.get_running_loop()
+        owned = []
+        waiting = {}
+        for key in keys:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.saved += 1
+                waiting[key] = future
+            else:
+                self._register(key, loop.create_future())
+                owned.append(key)
+        return owned, waiting
+
+    def settle(self, key, result=None):
+        future = self._inflight.get(key)
+        if future is not None and not future.done():
+            future.set_result(result)
+
+    def _register(self, key, future):
+        self.calls += 1
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._inflight.pop(key) if self._inflight.get(key) is done else None)
+
+    def log_stats(self):
+        info(f"Single-flight: {self.calls} upstream lookups, {self.saved} duplicate lookups saved")
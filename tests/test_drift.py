@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+from drift import DriftMonitor
+from features import FeatureSpec
+
+
+def coins(count, shift=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    spec = FeatureSpec()
+    data = {}
+    for feature in spec.features:
+        if feature.kind == "boolean":
+            data[feature.name] = rng.random(count) < 0.5
+        else:
+            data[feature.name] = rng.normal(50 + shift, 10, count)
+    return pd.DataFrame(data)
+
+
+def monitor(**settings):
+    drift = DriftMonitor(FeatureSpec(), min_count=100, **settings)
+    drift.fit(FeatureSpec().encode_frame(coins(3000)))
+    return drift
+
+
+def observe(drift, data):
+    for row in data.to_dict("records"):
+        drift.observe(row)
+
+
+def test_same_distribution_does_not_drift():
+    drift = monitor()
+    observe(drift, coins(300, seed=1))
+    assert drift.check() == {}
+
+
+def test_shifted_features_drift():
+    drift = monitor()
+    observe(drift, coins(150, shift=20, seed=2))
+    assert {"score", "holder_number"} <= set(drift.check())
+
+
+def test_back_off_pauses_checks_and_doubles_until_a_new_reference():
+    drift = monitor(cooldown=10, max_cooldown=30)
+    assert [drift.back_off(), drift.back_off(), drift.back_off()] == [10, 20, 30]
+    observe(drift, coins(150, shift=20, seed=3))
+    assert drift.check() == {}
+    drift.quiet_until = 0.0
+    assert drift.check()
+    drift.fit(FeatureSpec().encode_frame(coins(3000, seed=4)))
+    assert drift.back_off() == 10
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+import evaluation
+
+
+class ConstantModel:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def predict_proba(self, X):
+        return np.column_stack([np.zeros(len(X)), X["value"].to_numpy()])
+
+
+def test_each_window_is_tuned_on_older_rows_only(monkeypatch):
+    tuned_on = []
+
+    def fake_search(X, y, **settings):
+        tuned_on.append((X.index.max(), settings))
+        return ConstantModel(len(X)), {}
+
+    monkeypatch.setattr(evaluation, "successive_halving", fake_search)
+    X = pd.DataFrame({"value": np.linspace(0, 1, 100)})
+    y = pd.Series(np.arange(100) % 2)
+    inserted_at = pd.Series(pd.date_range("2026-09-01", periods=100, freq="min", tz="UTC"))
+
+    windows = evaluation.walk_forward(X, y, inserted_at, windows=4, budget_seconds=1)
+
+    assert [window["train_rows"] for window in windows] == [20, 40, 60, 80]
+    assert [window["rows"] for window in windows] == [20, 20, 20, 20]
+    for (last_row, settings), window in zip(tuned_on, windows):
+        assert last_row < window["train_rows"]
+        assert settings == {"budget_seconds": 1}
+    assert windows[0]["from"] == inserted_at.iloc[20].isoformat()
@@ -0,0 +1,105 @@
+import json
+import asyncio
+import websockets
+from listener import SignatureListener
+
+ADDRESS = "6EF8rrecthR5Dkzon8Nwu78hRvfCKubJ14M5uBEwF6P"
+
+
+def notification(signature, slot, err=None):
+    return json.dumps({
+        "jsonrpc": "2.0",
+        "method": "logsNotification",
+        "params": {"result": {"context": {"slot": slot}, "value": {"signature": signature, "err": err, "logs": []}}},
+    })
+
+
+class FakeResponse:
+    def __init__(self, result):
+        self.result = result
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return {"jsonrpc": "2.0", "id": "1", "result": self.result}
+
+
+class FakeRpc:
+    """getSignaturesForAddress over HTTP, newest first like the real RPC."""
+
+    def __init__(self, entries):
+        self.entries = entries
+        self.requests = []
+
+    async def post(self, url, headers=None, json=None, timeout=None):
+        self.requests.append(json["params"][1])
+        return FakeResponse(self.entries)
+
+
+async def listen(handler, client=None, count=1, timeout=5):
+    """Run a listener against a local websocket server until `count` signatures were delivered."""
+    delivered = []
+    done = asyncio.Event()
+
+    def on_signature(signature, slot):
+        delivered.append((signature, slot))
+        if len(delivered) >= count:
+            done.set()
+
+    async with websockets.serve(handler, "127.0.0.1", 0) as server:
+        port = server.sockets[0].getsockname()[1]
+        listener = SignatureListener(f"ws://127.0.0.1:{port}", "http://rpc", ADDRESS, on_signature, client=client, max_backoff=1)
+        task = asyncio.create_task(listener.run())
+        try:
+            await asyncio.wait_for(done.wait(), timeout)
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+    return delivered
+
+
+async def accept_subscription(ws):
+    request = json.loads(await ws.recv())
+    assert request["method"] == "logsSubscribe"
+    assert request["params"][0] == {"mentions": [ADDRESS]}
+    await ws.send(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": 7}))
+
+
+def test_delivers_successful_signatures():
+    async def handler(ws):
+        await accept_subscription(ws)
+        await ws.send(notification("failed", 10, err={"InstructionError": [0, "Custom"]}))
+        await ws.send(notification("first", 11))
+        await ws.send(notification("first", 11))
+        await ws.send(notification("second", 12))
+        await ws.wait_closed()
+
+    assert asyncio.run(listen(handler, count=2)) == [("first", 11), ("second", 12)]
+
+
+def test_reconnects_and_backfills_the_gap():
+    connections = []
+    # Missed while the socket was down, newest first.
+    rpc = FakeRpc([
+        {"signature": "missed-2", "slot": 13, "err": None},
+        {"signature": "missed-failed", "slot": 12, "err": {"InstructionError": [0, "Custom"]}},
+        {"signature": "missed-1", "slot": 12, "err": None},
+    ])
+
+    async def handler(ws):
+        connections.append(ws)
+        await accept_subscription(ws)
+        if len(connections) == 1:
+            await ws.send(notification("before-drop", 11))
+            await ws.close()
+            return
+        await asyncio.sleep(0.1)
+        await ws.send(notification("missed-2", 13))
+        await ws.send(notification("live", 14))
+        await ws.wait_closed()
+
+    delivered = asyncio.run(listen(handler, client=rpc, count=4))
+    assert delivered == [("before-drop", 11), ("missed-1", 12), ("missed-2", 13), ("live", 14)]
+    assert len(connections) == 2
+    assert rpc.requests[0]["until"] == "before-drop"
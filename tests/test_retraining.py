@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+from retraining import comparison_split, holdout_auc, train_candidate
+
+FAST = {"budget_seconds": 10, "candidates": 3, "min_rounds": 10, "max_rounds": 30, "threads": 1, "walk_forward_windows": 0}
+FEATURES = ["f0", "f1"]
+
+
+def drifting_coins(old=2000, new=2000, seed=0):
+    """Coins whose success depends on f0 first and on f1 once the regime changes."""
+    rng = np.random.default_rng(seed)
+    count = old + new
+    data = pd.DataFrame({feature: rng.normal(size=count) for feature in FEATURES})
+    signal = np.where(np.arange(count) < old, data["f0"], data["f1"]) * 2
+    data["success"] = (rng.random(count) < 1 / (1 + np.exp(-signal))).astype(int)
+    data["inserted_at"] = pd.date_range("2026-09-01", periods=count, freq="min", tz="UTC")
+    data["labeled_at"] = data["inserted_at"] + pd.Timedelta("1h")
+    return data
+
+
+def live_model(data, old):
+    seen = data.iloc[:old]
+    model, _ = train_candidate(seen[FEATURES], seen["success"], seen["inserted_at"], **FAST)
+    return model, seen["labeled_at"].max().isoformat()
+
+
+def test_comparison_split_trains_on_new_coins_and_holds_out_the_newest():
+    data = drifting_coins()
+    _, labeled_until = live_model(data, 2000)
+    train, holdout = comparison_split(data, labeled_until, 0.5)
+    assert len(train) == 3000 and len(holdout) == 1000
+    assert (train["labeled_at"] > pd.Timestamp(labeled_until)).sum() == 1000
+    assert holdout["inserted_at"].min() > train["inserted_at"].max()
+
+
+def test_candidate_trained_on_newer_coins_is_accepted_and_refit():
+    data = drifting_coins()
+    live, labeled_until = live_model(data, 2000)
+    train, holdout = comparison_split(data, labeled_until, 0.5)
+    live_auc = holdout_auc(live, holdout[FEATURES], holdout["success"])
+    model, report = train_candidate(
+        train[FEATURES], train["success"], train["inserted_at"], holdout[FEATURES], holdout["success"], live_auc, **FAST
+    )
+    assert report["holdout_auc"] > live_auc
+    assert report["accepted"]
+    assert report["refit_rows"] == 4000
+
+
+def test_tie_keeps_the_live_model():
+    data = drifting_coins()
+    _, labeled_until = live_model(data, 2000)
+    train, holdout = comparison_split(data, labeled_until, 0.5)
+    args = (train[FEATURES], train["success"], train["inserted_at"], holdout[FEATURES], holdout["success"])
+    _, first = train_candidate(*args, 0.0, **FAST)
+    _, report = train_candidate(*args, first["holdout_auc"], **FAST)
+    assert report["holdout_auc"] == first["holdout_auc"]
+    assert not report["accepted"]
+    assert report["refit_rows"] == 0
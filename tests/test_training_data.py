@@ -0,0 +1,78 @@
+import asyncio
+import numpy as np
+from xgboost import XGBClassifier
+from features import FeatureSpec
+from training_data import BOOLEAN_COLUMNS, COLUMNS, FEATURE_COLUMNS, TrainingDataLoader
+
+
+class FakeConnection:
+    def __init__(self, csv):
+        self.csv = csv
+
+    async def copy_from_query(self, query, *args, output=None, format=None, header=None):
+        output.write(self.csv.encode())
+
+
+class FakePool:
+    def __init__(self, csv):
+        self.connection = FakeConnection(csv)
+
+    def acquire(self):
+        pool = self
+
+        class Acquire:
+            async def __aenter__(self):
+                return pool.connection
+
+            async def __aexit__(self, *exc):
+                return False
+
+        return Acquire()
+
+
+class FakeDatabase:
+    def __init__(self, csv):
+        self.pool = FakePool(csv)
+
+    async def connect(self):
+        return self.pool
+
+
+def csv_rows(count, null_profit_owner=False):
+    """COPY ... CSV output as Postgres writes it: t/f booleans, empty NULLs, timestamps with and without fractions."""
+    lines = [",".join(COLUMNS)]
+    for index in range(count):
+        values = {
+            "token_address": f"token{index}",
+            "inserted_at": f"2026-09-01 00:{index % 60:02d}:00{'.5' if index % 2 else ''}+00",
+            "labeled_at": f"2026-09-01 01:{index % 60:02d}:00+00",
+            "success": "t" if index % 3 == 0 else "f",
+        }
+        for column in FEATURE_COLUMNS:
+            if column in BOOLEAN_COLUMNS:
+                values[column] = "t" if (index + len(column)) % 2 else "f"
+            else:
+                values[column] = str(index * 1.5)
+        if null_profit_owner and index % 4 == 0:
+            values["profit_owner"] = ""
+        lines.append(",".join(values[column] for column in COLUMNS))
+    return "\n".join(lines) + "\n"
+
+
+def test_boolean_columns_stay_bool_without_nulls():
+    data = asyncio.run(TrainingDataLoader(FakeDatabase(csv_rows(60)), cache_path=None).fetch())
+    for column in BOOLEAN_COLUMNS:
+        assert data[column].dtype == bool, column
+
+
+def test_null_checks_are_kept_as_none():
+    data = asyncio.run(TrainingDataLoader(FakeDatabase(csv_rows(60, null_profit_owner=True)), cache_path=None).fetch())
+    assert data["profit_owner"].isna().sum() == 15
+    assert data["telegram_check"].dtype == bool
+
+
+def test_loaded_rows_train_an_xgboost_model():
+    data = asyncio.run(TrainingDataLoader(FakeDatabase(csv_rows(60, null_profit_owner=True)), cache_path=None).fetch())
+    X = FeatureSpec().encode_frame(data)
+    assert all(dtype == np.float32 for dtype in X.dtypes)
+    XGBClassifier(n_estimators=2).fit(X, data["success"].astype(int))
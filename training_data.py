@@ -0,0 +1,103 @@
+import io
+import os
+import importlib.util
+import pandas as pd
+from features import FEATURES, BOOLEAN, NUMBER
+from logger import info, warn
+
+FEATURE_COLUMNS = [feature.name for feature in FEATURES]
+BOOLEAN_COLUMNS = [feature.name for feature in FEATURES if feature.kind == BOOLEAN] + ["success"]
+NUMERIC_COLUMNS = [feature.name for feature in FEATURES if feature.kind == NUMBER]
+KEY_COLUMNS = ["token_address", "inserted_at", "labeled_at"]
+COLUMNS = KEY_COLUMNS + FEATURE_COLUMNS + ["success"]
+
+
+class TrainingDataLoader:
+    """
+    Labeled coins for training, kept in a local columnar cache and topped up incrementally.
+
+    Only the feature columns, the label and the row keys are read. The rows labeled since the
+    cache's newest `labeled_at` (minus `overlap` seconds, for labels committed late) are streamed
+    with `COPY ... TO STDOUT` as CSV and parsed by pandas' C reader straight into typed columns,
+    without a Python object per row. The cache is Parquet when pyarrow is installed, a pickle
+    file otherwise.
+    """
+
+    def __init__(self, db, cache_path="training_cache.parquet", overlap=300):
+        self.db = db
+        self.overlap = overlap
+        self.cache_path = cache_path
+        if cache_path and cache_path.endswith(".parquet") and importlib.util.find_spec("pyarrow") is None:
+            self.cache_path = cache_path[:-len(".parquet")] + ".pkl"
+            warn(f"pyarrow is not installed, caching training data in {self.cache_path} instead (pip install pyarrow)")
+
+    def read_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return None
+        try:
+            if self.cache_path.endswith(".parquet"):
+                data = pd.read_parquet(self.cache_path)
+            else:
+                data = pd.read_pickle(self.cache_path)
+        except Exception as e:
+            warn(f"Could not read the training cache {self.cache_path}, rebuilding it: {e}")
+            return None
+        if list(data.columns) != COLUMNS:
+            warn("Training cache columns changed, rebuilding it")
+            return None
+        return data
+
+    def write_cache(self, data):
+        if not self.cache_path:
+            return
+        temporary = f"{self.cache_path}.tmp"
+        if self.cache_path.endswith(".parquet"):
+            data.to_parquet(temporary, index=False)
+        else:
+            data.to_pickle(temporary)
+        os.replace(temporary, self.cache_path)
+
+    async def fetch(self, since=None):
+        """Labeled rows with `labeled_at` after `since` (all labeled rows when None), oldest label first."""
+        query = f"SELECT {', '.join(COLUMNS)} FROM coins WHERE success IS NOT NULL"
+        args = []
+        if since is not None:
+            query += " AND labeled_at > $1::timestamptz - make_interval(secs => $2)"
+            args = [since.to_pydatetime(), float(self.overlap)]
+        query += " ORDER BY labeled_at"
+        buffer = io.BytesIO()
+        pool = await self.db.connect()
+        async with pool.acquire() as conn:
+            await conn.copy_from_query(query, *args, output=buffer, format="csv", header=True)
+        buffer.seek(0)
+        data = pd.read_csv(
+            buffer,
+            dtype={column: "float64" for column in NUMERIC_COLUMNS} | {"token_address": "string"},
+            true_values=["t"],
+            false_values=["f"]
+        )
+        for column in ("inserted_at", "labeled_at"):
+            data[column] = pd.to_datetime(data[column], utc=True, format="ISO8601")
+        for column in BOOLEAN_COLUMNS:
+            if data[column].isna().any():
+                # Keep NULL checks as None, the feature spec encodes them as missing.
+                data[column] = data[column].astype(object).where(data[column].notna(), None)
+            else:
+                data[column] = data[column].astype(bool)
+        return data[COLUMNS]
+
+    async def load(self):
+        """Cached rows plus every row labeled since the cache was written, one row per token."""
+        cached = self.read_cache()
+        since = cached["labeled_at"].max() if cached is not None and len(cached) else None
+        fresh = await self.fetch(since)
+        if cached is None or not len(cached):
+            data = fresh
+        elif not len(fresh):
+            data = cached
+        else:
+            data = pd.concat([cached, fresh], ignore_index=True)
+        data = data.drop_duplicates("token_address", keep="last").sort_values("labeled_at", kind="stable").reset_index(drop=True)
+        self.write_cache(data)
+        info(f"Training data: {len(fresh)} rows fetched, {len(data)} rows total ({'incremental' if since is not None else 'full load'})")
+        return data
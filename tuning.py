@@ -0,0 +1,90 @@
+import os
+import time
+import random
+from xgboost import XGBClassifier
+from sklearn.model_selection import ParameterGrid, train_test_split
+
+PARAM_SPACE = {
+    "max_depth": [3, 5, 7],
+    "learning_rate": [0.01, 0.1, 0.2],
+    "subsample": [0.8, 1.0],
+    "colsample_bytree": [0.8, 1.0],
+    "min_child_weight": [1, 5],
+}
+
+
+def default_threads():
+    """Every core but one, which stays free for the bot's event loop."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+def build_model(rounds, labels, threads, random_state=42, early_stopping_rounds=None, **params):
+    return XGBClassifier(
+        objective="binary:logistic",
+        eval_metric="auc",
+        n_estimators=rounds,
+        early_stopping_rounds=early_stopping_rounds,
+        scale_pos_weight=(labels == 0).sum() / max((labels == 1).sum(), 1),
+        n_jobs=threads,
+        random_state=random_state,
+        **params
+    )
+
+
+def successive_halving(X, y, budget_seconds=300, candidates=27, eta=3, min_rounds=30, max_rounds=810,
+                       early_stopping_rounds=20, validation_size=0.2, threads=None, random_state=42):
+    """
+    Budgeted hyperparameter search for the success model.
+
+    `candidates` configurations sampled from PARAM_SPACE start with `min_rounds` boosting rounds.
+    After each rung only the best 1/`eta` (by validation AUC) go on, with `eta` times more rounds,
+    until one is left, `max_rounds` is reached or `budget_seconds` is spent. Rows must be in time
+    order: the newest `validation_size` of them are the validation set. Every fit stops early
+    once the validation AUC has not improved for `early_stopping_rounds` rounds. Each fit uses
+    exactly `threads` XGBoost threads and fits run one at a time, so the search never asks for
+    more cores than it was given.
+
+    The winner is refit on all rows with the number of rounds it needed. Returns (model, report).
+    """
+    started = time.perf_counter()
+    threads = threads or default_threads()
+    # No shuffling: the model is validated on coins newer than the ones it learned from.
+    X_train, X_valid, y_train, y_valid = train_test_split(X, y, test_size=validation_size, shuffle=False)
+
+    configs = list(ParameterGrid(PARAM_SPACE))
+    random.Random(random_state).shuffle(configs)
+    configs = configs[:candidates]
+    rounds = min_rounds
+    fits = 0
+    rungs = []
+    while True:
+        scored = []
+        for params in configs:
+            if scored and time.perf_counter() - started > budget_seconds:
+                break
+            candidate = build_model(rounds, y_train, threads, random_state, early_stopping_rounds, **params)
+            candidate.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+            fits += 1
+            scored.append((candidate.best_score, candidate.best_iteration + 1, params))
+        scored.sort(key=lambda result: result[0], reverse=True)
+        rungs.append({"rounds": rounds, "fits": len(scored), "best_auc": round(float(scored[0][0]), 4)})
+        if len(configs) == 1 or rounds >= max_rounds or time.perf_counter() - started > budget_seconds:
+            break
+        configs = [params for _, _, params in scored[:max(1, len(scored) // eta)]]
+        rounds = min(rounds * eta, max_rounds)
+
+    validation_auc, best_rounds, best_params = scored[0]
+    final = build_model(best_rounds, y, threads, random_state, **best_params)
+    final.fit(X, y, verbose=False)
+    fits += 1
+    seconds = time.perf_counter() - started
+    return final, {
+        "best_params": best_params,
+        "best_rounds": best_rounds,
+        "validation_auc": float(validation_auc),
+        "fits": fits,
+        "seconds": seconds,
+        "fits_per_second": fits / seconds if seconds else 0.0,
+        "threads": threads,
+        "rungs": rungs,
+    }
@@ -0,0 +1,96 @@
+import json
+import time
+import sqlite3
+from collections import OrderedDict
+from logger import error, info
+
+
+class WalletCache:
+    """
+    Per-wallet facts (signature count, holder category, profit verdict) with a timestamp each.
+
+    Entries live in an in-memory LRU bounded by `max_size`. When `path` is set they are also
+    written to SQLite so they survive restarts. Each field expires after its own TTL.
+    """
+
+    def __init__(self, path=None, max_size=100000, ttl=None):
+        self.max_size = max_size
+        self.ttl = {"signature_count": 6 * 3600, "category": 6 * 3600, "profitable": 24 * 3600, **(ttl or {})}
+        self.entries = OrderedDict()
+        self.hits = {}
+        self.misses = {}
+        self.db = None
+        if path:
+            try:
+                self.db = sqlite3.connect(path)
+                self.db.execute("PRAGMA journal_mode=WAL")
+                self.db.execute("PRAGMA synchronous=NORMAL")
+                self.db.execute("CREATE TABLE IF NOT EXISTS wallets (wallet TEXT PRIMARY KEY, data TEXT NOT NULL)")
+                self.db.commit()
+            except sqlite3.Error as e:
+                error(f"Could not open wallet cache {path}, using memory only: {e}")
+                self.db = None
+
+    def _entry(self, wallet):
+        entry = self.entries.get(wallet)
+        if entry is not None:
+            self.entries.move_to_end(wallet)
+            return entry
+        if self.db is not None:
+            row = self.db.execute("SELECT data FROM wallets WHERE wallet = ?", (wallet,)).fetchone()
+            if row:
+                entry = json.loads(row[0])
+                self._remember(wallet, entry)
+        return entry
+
+    def _remember(self, wallet, entry):
+        self.entries[wallet] = entry
+        self.entries.move_to_end(wallet)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def get(self, wallet, field):
+        """Cached value of `field` for `wallet`, or None when missing or older than its TTL."""
+        entry = self._entry(wallet)
+        if entry is not None and field in entry and time.time() - entry.get(f"{field}_at", 0) < self.ttl.get(field, 0):
+            self.hits[field] = self.hits.get(field, 0) + 1
+            return entry[field]
+        self.misses[field] = self.misses.get(field, 0) + 1
+        return None
+
+    def peek(self, wallet):
+        """Whole entry for `wallet` whatever its age (cursors and aggregates), without counting a hit or miss."""
+        return self._entry(wallet)
+
+    def set_many(self, updates):
+        """Store `{wallet: {field: value}}`, stamping every field with the current time."""
+        now = time.time()
+        rows = []
+        for wallet, fields in updates.items():
+            entry = dict(self._entry(wallet) or {})
+            for field, value in fields.items():
+                entry[field] = value
+                entry[f"{field}_at"] = now
+            self._remember(wallet, entry)
+            rows.append((wallet, json.dumps(entry)))
+        if self.db is not None and rows:
+            try:
+                self.db.executemany("INSERT OR REPLACE INTO wallets (wallet, data) VALUES (?, ?)", rows)
+                self.db.commit()
+            except sqlite3.Error as e:
+                error(f"Error writing wallet cache: {e}")
+
+    def set(self, wallet, **fields):
+        self.set_many({wallet: fields})
+
+    def log_stats(self):
+        for field in sorted(set(self.hits) | set(self.misses)):
+            hits = self.hits.get(field, 0)
+            misses = self.misses.get(field, 0)
+            info(f"Wallet cache {field}: {hits} hits, {misses} misses ({hits / (hits + misses) * 100:.1f}% hit rate)")
+
+    def close(self):
+        self.log_stats()
+        if self.db is not None:
+            self.db.close()
+            self.db = None